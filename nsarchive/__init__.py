@@ -22,7 +22,30 @@ from .cls.economy import *
 
 from .cls.exceptions import *
 
+from .feed import ChangeEvent, ChangeFeed, RealtimeChangeFeed
+
 # Import des instances
-from .instances._economy import EconomyInstance
-from .instances._entities import EntityInstance
-from .instances._republic import RepublicInstance
\ No newline at end of file
+# Les instances (et avec elles supabase) ne sont importées qu'au premier accès, pour ne pas ralentir les scripts qui n'utilisent que les modèles
+import importlib
+
+_lazy = {
+    'EconomyInstance': '.instances._economy',
+    'EntityInstance': '.instances._entities',
+    'XPBuffer': '.instances._entities',
+    'RepublicInstance': '.instances._republic'
+}
+
+def __getattr__(name: str):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_lazy[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+# Tout ce que définit le paquet, instances comprises (`from nsarchive import *` ne passe pas par __getattr__)
+__all__ = sorted([ name for name, value in globals().items() if not name.startswith('_') and getattr(value, '__module__', '').startswith(__name__) ] + list(_lazy))
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_lazy))
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Statistiques économiques calculées avec NumPy.
+
+Les comptes et les archives de transactions sont lus page par page puis rangés en colonnes (`numpy.ndarray`), ce qui permet de traiter plusieurs millions de lignes sans garder les dictionnaires renvoyés par Supabase en mémoire.
+
+Nécessite `numpy` (`pip install nsarchive[analytics]`).
+"""
+
+try:
+    import numpy as np
+except ImportError as err:
+    raise ImportError("nsarchive.analytics requires numpy, install it with `pip install nsarchive[analytics]`.") from err
+
+from .cls.base import Instance
+
+def _columns(pages, fields: dict[str, type]) -> dict[str, np.ndarray]:
+    chunks = { name: [] for name in fields }
+
+    for page in pages:
+        for name, dtype in fields.items():
+            chunks[name].append(np.fromiter((row[name] or 0 for row in page), dtype = dtype, count = len(page)) if dtype is not object else np.array([ row[name] for row in page ], dtype = object))
+
+    return { name: np.concatenate(parts) if parts else np.empty(0, dtype = fields[name]) for name, parts in chunks.items() }
+
+def load_accounts(instance: Instance, page_size: int = 1000, **query) -> dict[str, np.ndarray]:
+    """
+    Charge les comptes bancaires en colonnes.
+
+    ## Paramètres
+    instance: `.EconomyInstance`\n
+        Instance à utiliser
+    page_size: `int`\n
+        Nombre de comptes par requête
+    query: `dict`\n
+        Filtres sur les comptes (voir `Instance._filter`)
+
+    ## Renvoie
+    - `dict[str, numpy.ndarray]` avec les colonnes `id`, `owner_id`, `bank` (objets), `amount`, `income` (`int64`) et `frozen` (`bool`)
+    """
+
+    pages = instance._stream_from_db('accounts', 'id, owner_id, bank, amount, income, frozen', page_size = page_size, **query)
+
+    return _columns(pages, {
+        'id': object,
+        'owner_id': object,
+        'bank': object,
+        'amount': np.int64,
+        'income': np.int64,
+        'frozen': np.bool_
+    })
+
+def load_transactions(instance: Instance, since: int = None, until: int = None, parties: bool = False, page_size: int = 1000) -> dict[str, np.ndarray]:
+    """
+    Charge les archives de transactions en colonnes. Seuls la date et le montant sont récupérés, sauf si `parties` est activé.
+
+    ## Paramètres
+    instance: `.EconomyInstance`\n
+        Instance à utiliser
+    since: `int`\n
+        Date (timestamp) minimale, incluse (facultatif)
+    until: `int`\n
+        Date (timestamp) maximale, exclue (facultatif)
+    parties: `bool`\n
+        Récupérer aussi les comptes débités (`author`) et crédités (`target`)
+    page_size: `int`\n
+        Nombre de transactions par requête
+
+    ## Renvoie
+    - `dict[str, numpy.ndarray]` avec les colonnes `date` et `amount` (`int64`), plus `author` et `target` (objets) si demandé
+    """
+
+    query = { '_type': 'transaction' }
+
+    if since is not None:
+        query['date__gte'] = since
+
+    if until is not None:
+        query['date__lt'] = until
+
+    fields = { 'date': np.int64, 'amount': np.int64 }
+
+    if parties:
+        fields.update(author = object, target = object)
+
+    columns = 'id, date, amount:details->amount' + (', author, target' if parties else '')
+    pages = instance._stream_from_db('archives', columns, page_size = page_size, **query)
+
+    return _columns(pages, fields)
+
+def money_supply(accounts: dict[str, np.ndarray], include_frozen: bool = True) -> int:
+    """
+    Calcule la masse monétaire (somme de tous les comptes).
+    """
+
+    amounts = accounts['amount'] if include_frozen else accounts['amount'][~accounts['frozen']]
+
+    return int(amounts.sum())
+
+def balance_histogram(accounts: dict[str, np.ndarray], bins: int | list[int] = 20, log: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Répartit les comptes selon leur solde.
+
+    ## Paramètres
+    accounts: `dict[str, numpy.ndarray]`\n
+        Colonnes renvoyées par `load_accounts`
+    bins: `int | list[int]`\n
+        Nombre de tranches, ou limites des tranches
+    log: `bool`\n
+        Tranches de largeur logarithmique (pour les soldes positifs)
+
+    ## Renvoie
+    - `tuple[numpy.ndarray, numpy.ndarray]`: Nombre de comptes par tranche, et limites des tranches
+    """
+
+    amounts = accounts['amount']
+
+    if log and isinstance(bins, int):
+        amounts = amounts[amounts > 0]
+        bins = np.geomspace(1, max(int(amounts.max(initial = 1)), 2), bins + 1)
+
+    return np.histogram(amounts, bins = bins)
+
+def gini(amounts: np.ndarray) -> float:
+    """
+    Calcule le coefficient de Gini d'une distribution de richesse (0 = égalité parfaite, 1 = inégalité totale). Les soldes négatifs comptent pour 0.
+    """
+
+    values = np.sort(np.clip(np.asarray(amounts, dtype = np.float64), 0, None))
+    total = values.sum()
+
+    if not total:
+        return 0.0
+
+    n = values.size
+    ranks = np.arange(1, n + 1)
+
+    return float(2 * np.dot(ranks, values) / (n * total) - (n + 1) / n)
+
+def daily_volume(transactions: dict[str, np.ndarray], utc_offset: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcule le volume échangé chaque jour.
+
+    ## Paramètres
+    transactions: `dict[str, numpy.ndarray]`\n
+        Colonnes renvoyées par `load_transactions`
+    utc_offset: `int`\n
+        Décalage horaire (en secondes) pour le découpage des jours
+
+    ## Renvoie
+    - `tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]`: Date (timestamp) de début de chaque jour, somme échangée et nombre de transactions
+    """
+
+    days = (transactions['date'] + utc_offset) // 86400
+    days, inverse = np.unique(days, return_inverse = True)
+
+    volume = np.bincount(inverse, weights = transactions['amount']).astype(np.int64)
+    count = np.bincount(inverse)
+
+    return days * 86400 - utc_offset, volume, count
@@ -1,7 +1,13 @@
 import json
+import threading
 import typing
 
-from supabase import Client
+from concurrent.futures import ThreadPoolExecutor
+
+from ..feed import ChangeEvent, ChangeFeed
+
+if typing.TYPE_CHECKING: # supabase n'est importé qu'à la création d'une instance
+    from supabase import Client
 
 class NSID(str):
     """
@@ -25,27 +31,137 @@ class NSID(str):
     egalitary_com = "105"
     antifraud_dept = "106"
 
+    __slots__ = ('_int',)
+
+    _pool: dict[str | int, "NSID"] = None # Pool d'IDs déjà convertis, désactivé par défaut (voir `NSID.intern`)
+    _pool_size: int = 0
+
     def __new__(cls, value):
+        if type(value) is cls: # Déjà converti
+            return value
+
+        pool = cls._pool
+
+        if pool is not None and type(value) in (str, int):
+            instance = pool.get(value)
+
+            if instance is not None:
+                return instance
+
         if type(value) == int:
-            value = hex(value)
-        elif type(value) in (str, NSID):
-            value = hex(int(value, 16))
+            _int = value
+        elif isinstance(value, str):
+            _int = int(value, 16)
         else:
             raise TypeError(f"<{value}> is not NSID serializable")
 
-        if value.startswith("0x"):
-            value = value[2:]
+        instance = super(NSID, cls).__new__(cls, f"{_int:X}" if _int >= 0 else f"-{-_int:X}")
+        instance._int = _int
+
+        if pool is not None and type(value) in (str, int):
+            if len(pool) >= cls._pool_size:
+                pool.clear()
+
+            pool[value] = instance
 
-        instance = super(NSID, cls).__new__(cls, value.upper())
         return instance
 
+    def __int__(self) -> int:
+        return self._int
+
+    @classmethod
+    def intern(cls, enabled: bool = True, max_size: int = 100_000) -> None:
+        """
+        Active ou désactive le pool d'IDs: chaque valeur déjà convertie renvoie le même `NSID` au lieu d'être convertie à nouveau. Utile quand les mêmes IDs reviennent dans de nombreuses lignes (auteurs, comptes, votants...).
+
+        ## Paramètres
+        enabled: `bool`\n
+            Activer le pool
+        max_size: `int`\n
+            Nombre maximal d'IDs gardés (le pool est vidé quand il est plein)
+        """
+
+        cls._pool = {} if enabled else None
+        cls._pool_size = max_size
+
+    @classmethod
+    def many(cls, values: typing.Iterable) -> list["NSID"]:
+        """
+        Convertit une série de valeurs en `NSID`, pour hydrater rapidement de nombreuses lignes. Les valeurs répétées ne sont converties qu'une fois.
+        """
+
+        seen: dict = {}
+        result = []
+
+        for value in values:
+            try:
+                instance = seen[value]
+            except KeyError:
+                instance = seen[value] = cls(value)
+
+            result.append(instance)
+
+        return result
+
 class Instance:
     """
     Instance qui servira de base à toutes les instances.
     """
-    def __init__(self, client: Client):
+
+    _feed_tables: tuple[str] = () # Tables dont les modifications concernent les caches de l'instance
+
+    def __init__(self, client: "Client"):
         self.db = client
 
+        self._locations: dict[NSID, str] = {} # Table dans laquelle se trouve chaque ID déjà rencontré
+        self._executor: ThreadPoolExecutor = None
+
+        self._lock: threading.RLock = threading.RLock() # Protège les caches, aussi modifiés par le thread du flux de modifications
+        self._changes: int = 0 # Nombre de modifications reçues du flux, voir `_handle_change`
+
+    def attach_feed(self, feed: ChangeFeed) -> None:
+        """
+        Relie l'instance à un flux de modifications, pour que ses caches restent à jour quand un autre processus modifie la base.\n
+        Une fois reliée, les durées de cache (`tally_ttl`, `book_ttl`...) peuvent être allongées sans risque de servir des données périmées.
+
+        ## Paramètres
+        feed: `.ChangeFeed`\n
+            Flux à suivre
+        """
+
+        for table in self._feed_tables:
+            feed.subscribe(table, self._handle_change)
+
+    def _handle_change(self, event: ChangeEvent) -> None:
+        # Appelée depuis le thread du flux. Une valeur lue en base avant une modification ne doit pas être mise en cache après elle: `_changes` permet de le vérifier.
+        with self._lock:
+            self._changes += 1
+            self._on_change(event)
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.id is None:
+            return
+
+        if event.type == 'DELETE':
+            self._locations.pop(NSID(event.id), None)
+        else:
+            self._locations[NSID(event.id)] = event.table
+
+    def use_replica(self, path: str) -> None:
+        """
+        Fait lire l'instance depuis une réplique locale (voir `nsarchive.replica.sync_replica`) au lieu de la base.\n
+        L'instance passe en lecture seule: les enregistrements et les fonctions côté serveur lèvent une `PermissionError`, y compris les lectures qui passent par une fonction côté serveur (voir `nsarchive.replica.ReplicaClient`). Les tables qui n'ont pas été synchronisées lèvent une `LookupError`. Le stockage de fichiers reste celui de la base.
+
+        ## Paramètres
+        path: `str`\n
+            Chemin du fichier SQLite
+        """
+
+        from ..replica import ReplicaClient
+
+        self.db = ReplicaClient(path, storage = getattr(self.db, 'storage', None))
+        self._locations.clear()
+
     def _select_from_db(self, table: str, key: str = None, value: str = None) -> list:
         """
         Récupère des données JSON d'une table Supabase en fonction de l'ID.
@@ -73,6 +189,127 @@ class Instance:
         else:
             return None
 
+    def _select_many(self, table: str, columns: str = "*", order: str | tuple[str] = None, desc: bool = False, limit: int = None, offset: int = 0, **filters: typing.Any) -> list:
+        """
+        Récupère en une seule requête les données d'une table Supabase correspondant à plusieurs filtres.
+
+        ## Paramètres
+        table: `str`\n
+            Nom de la base
+        columns: `str`\n
+            Colonnes à récupérer (toutes par défaut)
+        order: `str | tuple[str]`\n
+            Colonne(s) selon laquelle trier les résultats côté serveur (facultatif)
+        desc: `bool`\n
+            Tri décroissant plutôt que croissant
+        limit: `int`\n
+            Nombre maximal de résultats (facultatif)
+        offset: `int`\n
+            Nombre de résultats à sauter, pour la pagination
+        filters: `dict`\n
+            Filtres à appliquer (voir `_filter`)
+
+        ## Renvoie
+        - `list` de tous les élements correspondants (vide si rien n'est trouvé)
+        """
+
+        req = self._filter(self.db.from_(table).select(columns), **filters)
+
+        for column in ((order,) if isinstance(order, str) else order or ()):
+            req = req.order(column, desc = desc)
+
+        if limit is not None:
+            req = req.range(offset, offset + limit - 1)
+        elif offset:
+            req = req.offset(offset)
+
+        res = req.execute()
+
+        return res.data if res.data else []
+
+    def _count_in_db(self, table: str, **filters: typing.Any) -> int:
+        """
+        Compte côté serveur les lignes d'une table correspondant aux filtres, sans les récupérer.
+
+        ## Paramètres
+        table: `str`\n
+            Nom de la base
+        filters: `dict`\n
+            Filtres à appliquer (voir `_filter`)
+
+        ## Renvoie
+        - `int`: Nombre de lignes correspondantes
+        """
+
+        from postgrest.types import CountMethod
+
+        req = self.db.from_(table).select("id", count = CountMethod.exact, head = True)
+        res = self._filter(req, **filters).execute()
+
+        return res.count or 0
+
+    def _stream_from_db(self, table: str, columns: str = "*", key: str | tuple[str, str] = "id", page_size: int = 1000, start: typing.Any = None, **filters: typing.Any) -> typing.Iterator[list]:
+        """
+        Parcourt une table Supabase page par page, sans jamais la charger entièrement.\n
+        La pagination se fait par clé (`key > dernière valeur lue`) plutôt que par décalage, donc chaque page coûte le même prix côté serveur.
+
+        ## Paramètres
+        table: `str`\n
+            Nom de la base
+        columns: `str`\n
+            Colonnes à récupérer (doivent inclure `key`)
+        key: `str | tuple[str, str]`\n
+            Colonne unique selon laquelle paginer, ou couple `(colonne de tri, colonne unique)` (ex: `('date', 'id')`)
+        page_size: `int`\n
+            Nombre de lignes par page
+        start: `Any`\n
+            Dernière valeur de `key` déjà lue, pour reprendre un parcours (facultatif)
+        filters: `dict`\n
+            Filtres à appliquer (voir `_filter`)
+
+        ## Renvoie
+        - Un itérateur sur les pages (`list` de lignes)
+        """
+
+        last = start
+
+        while True:
+            if last is not None:
+                if isinstance(key, tuple):
+                    filters['or_'] = f"{key[0]}.gt.{last[0]},and({key[0]}.eq.{last[0]},{key[1]}.gt.{last[1]})"
+                else:
+                    filters[f"{key}__gt"] = last
+
+            page = self._select_many(table, columns, order = key, limit = page_size, **filters)
+
+            if page:
+                yield page
+
+            if len(page) < page_size:
+                return
+
+            last = tuple(page[-1][k] for k in key) if isinstance(key, tuple) else page[-1][key]
+
+    def _filter(self, req, **filters: typing.Any):
+        """
+        Applique des filtres à une requête Supabase. Une `list` ou un `tuple` vérifie l'appartenance (`in`), toute autre valeur l'égalité.\n
+        Une clé suffixée par `__neq`, `__gt`, `__gte`, `__lt` ou `__lte` applique la comparaison correspondante (ex: `amount__gt = 0`), et la clé `or_` un filtre `or` brut de PostgREST.
+        """
+
+        for key, value in filters.items():
+            key, _, op = key.partition('__')
+
+            if key == 'or_':
+                req = req.or_(value)
+            elif op in ('neq', 'gt', 'gte', 'lt', 'lte'):
+                req = getattr(req, op)(key, value)
+            elif isinstance(value, (list, tuple, set)):
+                req = req.in_(key, list(value))
+            else:
+                req = req.eq(key, value)
+
+        return req
+
     def _get_by_ID(self, table: str, id: NSID) -> dict:
         _data = self._select_from_db(table, 'id', id)
 
@@ -81,12 +318,51 @@ class Instance:
 
         return _data
 
-    def _put_in_db(self, table: str, data: dict) -> None:
+    def _locate_by_ID(self, tables: list[str], id: NSID) -> tuple[str, dict]:
+        """
+        Récupère une donnée dont on ne sait pas dans quelle table elle se trouve.\n
+        Si la table de l'ID est déjà connue, une seule requête est envoyée. Sinon, toutes les tables sont interrogées simultanément.
+
+        ## Paramètres
+        tables: `list[str]`\n
+            Tables possibles, par ordre de priorité
+        id: `NSID`\n
+            ID de la donnée
+
+        ## Renvoie
+        - `tuple[str, dict]`: la table et la donnée trouvées
+        - `tuple[None, None]` si rien n'est trouvé
+        """
+
+        id = NSID(id)
+        table = self._locations.get(id)
+
+        if table in tables:
+            _data = self._get_by_ID(table, id)
+
+            if _data is not None:
+                return table, _data
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers = 4)
+
+        futures = [ self._executor.submit(self._get_by_ID, table, id) for table in tables ]
+
+        for table, future in zip(tables, futures):
+            _data = future.result()
+
+            if _data is not None:
+                self._locations[id] = table
+                return table, _data
+
+        return None, None
+
+    def _put_in_db(self, table: str, data: dict | list[dict]) -> None:
         """
         Publie des données JSON dans une table Supabase en utilisant le client Supabase.
 
         :param table: Nom de la table dans laquelle les données doivent être insérées
-        :param data: Dictionnaire contenant les données à publier
+        :param data: Dictionnaire contenant les données à publier, ou liste de dictionnaires pour une écriture groupée
         :return: Résultat de l'insertion
         """
 
@@ -94,6 +370,47 @@ class Instance:
 
         return res
 
+    def _update_in_db(self, table: str, data: dict, **filters: typing.Any) -> int:
+        """
+        Modifie en une seule requête toutes les lignes d'une table correspondant aux filtres.
+
+        ## Paramètres
+        table: `str`\n
+            Nom de la table
+        data: `dict`\n
+            Colonnes à modifier et leur nouvelle valeur
+        filters: `dict`\n
+            Filtres à appliquer (voir `_filter`)
+
+        ## Renvoie
+        - `int`: Nombre de lignes modifiées
+        """
+
+        from postgrest.types import CountMethod, ReturnMethod
+
+        req = self.db.from_(table).update(data, count = CountMethod.exact, returning = ReturnMethod.minimal)
+        res = self._filter(req, **filters).execute()
+
+        return res.count or 0
+
+    def _call_rpc(self, function: str, params: dict = {}) -> typing.Any:
+        """
+        Exécute une fonction SQL côté serveur (RPC Supabase).
+
+        ## Paramètres
+        function: `str`\n
+            Nom de la fonction
+        params: `dict`\n
+            Arguments nommés passés à la fonction
+
+        ## Renvoie
+        - Le résultat renvoyé par la fonction (`list`, `dict` ou valeur simple)
+        """
+
+        res = self.db.rpc(function, params).execute()
+
+        return res.data
+
     def _delete_from_db(self, table: str, key: str, value: str):
         """
         Supprime un enregistrement d'une table Supabase en fonction d'une clé et de sa valeur.
@@ -115,6 +432,27 @@ class Instance:
 
         return res
 
+    def _delete_many(self, table: str, **filters: typing.Any) -> int:
+        """
+        Supprime en une seule requête toutes les lignes d'une table correspondant aux filtres.
+
+        ## Paramètres
+        table: `str`\n
+            Nom de la table
+        filters: `dict`\n
+            Filtres à appliquer (voir `_filter`)
+
+        ## Renvoie
+        - `int`: Nombre de lignes supprimées
+        """
+
+        from postgrest.types import CountMethod, ReturnMethod
+
+        req = self.db.from_(table).delete(count = CountMethod.exact, returning = ReturnMethod.minimal)
+        res = self._filter(req, **filters).execute()
+
+        return res.count or 0
+
     def _delete_by_ID(self, table: str, id: NSID):
         res = self._delete_from_db(table, 'id', id)
 
@@ -53,13 +53,13 @@ class Inventory:
     ## Attributs
     - owner_id: `NSID`\n
         ID du propriétaire de l'inventaire
-    - objects: `dict[str, NSID]`\n
-        Collection d'objets et leur quantité
+    - objects: `dict[NSID, int]`\n
+        Collection d'objets (par ID) et leur quantité
     """
 
     def __init__(self, owner_id: NSID) -> None:
         self.owner_id: NSID = NSID(owner_id)
-        self.objects: dict[str, NSID] = {}
+        self.objects: dict[NSID, int] = {}
 
     def append(self, item: Item, quantity: int = 1):
         if item.id in self.objects.keys():
@@ -86,7 +86,7 @@ class Sale:
     - quantity: `int`\n
         Quantité d'objets mis en vente
     - price: `int`\n
-        Prix total du lot
+        Prix à l'unité de chaque objet
     - seller_id: `NSID`\n
         Identifiant du vendeur
     """
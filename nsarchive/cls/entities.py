@@ -1,3 +1,4 @@
+import bisect
 import time
 
 from .exceptions import *
@@ -32,6 +33,14 @@ class PositionPermissions:
         for perm in permissions.items():
             self.__setattr__(*perm)
 
+_levels: list[int] = [ int(round(25 * (i * 2.5) ** 2, -2)) for i in range(1000) ] # XP nécessaire pour chaque niveau
+
+def xp_to_level(xp: int) -> int:
+    while xp > _levels[-1]:
+        _levels.extend(int(round(25 * (i * 2.5) ** 2, -2)) for i in range(len(_levels), 2 * len(_levels)))
+
+    return bisect.bisect_left(_levels, xp)
+
 class Position:
     """
     Position légale d'une entité
@@ -105,8 +114,8 @@ class User(Entity):
         Ensemble des boosts dont bénéficie l'entité
     - permissions: `.PositionPermissions`\n
         Fusion des permissions offertes par la position et les groupes
-    - votes: `list[NSID]`\n
-        Liste des votes auxquels a participé l'entité
+    - votes: `set[NSID]`\n
+        Ensemble des votes auxquels a participé l'entité
     """
 
     def __init__(self, id: NSID) -> None:
@@ -115,22 +124,39 @@ class User(Entity):
         self.xp: int = 0
         self.boosts: dict[str, int] = {}
         self.permissions: PositionPermissions = PositionPermissions() # Elles seront définies en récupérant les permissions de sa position
-        self.votes: list[str] = []
+        self.votes: set[NSID] = set()
 
     def add_vote(self, id: NSID):
-        self.votes.append(NSID(id))
+        id = NSID(id)
 
-    def get_level(self) -> None:
-        i = 0
-        while self.xp > int(round(25 * (i * 2.5) ** 2, -2)):
-            i += 1
+        if id in self.votes:
+            raise AlreadyVotedError(f"<{self.id}> has already voted in <{id}>.")
 
-        return i
+        self.votes.add(id)
 
-    def add_xp(self, amount: int) -> None:
-        boost = 0 if 0 in self.boosts.values() else max(list(self.boosts.values()) + [ 1 ])
+    def has_voted(self, id: NSID) -> bool:
+        return NSID(id) in self.votes
+
+    def get_level(self) -> int:
+        return xp_to_level(self.xp)
+
+    @property
+    def boosts(self) -> dict[str, int]:
+        return self._boosts
+
+    @boosts.setter
+    def boosts(self, boosts: dict[str, int]) -> None:
+        self._boosts = boosts
+        self._multiplier = None
 
-        self.xp += amount * boost
+    def get_multiplier(self) -> int:
+        if self._multiplier is None: # Recalculé seulement quand les boosts changent
+            self._multiplier = 0 if 0 in self.boosts.values() else max(list(self.boosts.values()) + [ 1 ])
+
+        return self._multiplier
+
+    def add_xp(self, amount: int) -> None:
+        self.xp += amount * self.get_multiplier()
 
     def edit_boost(self, name: str, multiplier: int = -1) -> None:
         if multiplier >= 0:
@@ -138,6 +164,8 @@ class User(Entity):
         else:
             del self.boosts[name]
 
+        self._multiplier = None
+
 class MemberPermissions:
     """
     Permissions d'un utilisateur à l'échelle d'un groupe
@@ -238,13 +266,24 @@ class Organization(Entity):
         super().__init__(NSID(id))
 
         self.owner: Entity = User(NSID(0x0))
-        self.avatar: bytes = utils.open_asset('default_avatar.png')
+        self._avatar: bytes = None # L'avatar par défaut n'est chargé qu'au premier accès
 
         self.certifications: dict = {}
         self.members: list[GroupMember] = []
 
         self.parts: list[Share] = 50 * [ Share(self.owner.id, 0) ]
 
+    @property
+    def avatar(self) -> bytes:
+        if self._avatar is None:
+            self._avatar = utils.open_asset('default_avatar.png')
+
+        return self._avatar
+
+    @avatar.setter
+    def avatar(self, value: bytes) -> None:
+        self._avatar = value
+
     def add_certification(self, certification: str) -> None:
         self.certifications[certification] = round(time.time())
 
@@ -18,6 +18,16 @@ class AlreadyVotedError(Exception):
     def __init__(self, *args: object) -> None:
         super().__init__(*args)
 
+# Exceptions liées à l'économie
+
+class AccountFrozenError(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+class InsufficientFundsError(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
 # Ressource pas trouvée
 
 class RessourceNotFoundError(Exception):
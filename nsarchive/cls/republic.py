@@ -53,13 +53,27 @@ class Vote:
                 return opt
 
     def sorted(self, titles_only: bool = False) -> list[VoteOption] | list[str]:
-        sorted_list: list[VoteOption] = sorted(self.choices, lambda opt : opt.count)
+        sorted_list: list[VoteOption] = sorted(self.choices, key = lambda opt : opt.count, reverse = True)
 
         if titles_only:
             return [ opt.id for opt in sorted_list ]
         else:
             return sorted_list
 
+    def total(self) -> int:
+        return sum(opt.count for opt in self.choices)
+
+    def percentages(self) -> dict[str, float]:
+        total = self.total()
+
+        return { opt.id: (100 * opt.count / total if total else 0.0) for opt in self.choices }
+
+    def leader(self) -> VoteOption | None:
+        if not self.total():
+            return None
+
+        return max(self.choices, key = lambda opt : opt.count)
+
 class Referendum(Vote):
     """
     Vote à trois positions
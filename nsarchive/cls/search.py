@@ -0,0 +1,194 @@
+import bisect
+import threading
+import typing
+import unicodedata
+
+from .base import NSID
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.casefold())
+
+    return ''.join(char for char in text if not unicodedata.combining(char)).strip()
+
+def _trigrams(text: str) -> set[str]:
+    text = f"  {text} "
+
+    return { text[i:i + 3] for i in range(len(text) - 2) }
+
+class NameIndex:
+    """
+    Index en mémoire des noms d'entités, pour la recherche par préfixe et la recherche approximative (trigrammes).
+
+    Les noms sont comparés sans tenir compte de la casse ni des accents. Les résultats sont classés ainsi: nom identique, nom commençant par la recherche, mot commençant par la recherche, puis ressemblance (part de trigrammes en commun).
+
+    L'index peut être modifié depuis un autre thread (ex: flux de modifications) pendant une recherche.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[NSID, tuple[str, str, str]] = {} # (nom, type, nom normalisé)
+
+        self._words: list[tuple[str, NSID]] = [] # Mots des noms, triés pour la recherche par préfixe
+        self._trigrams: dict[str, set[NSID]] = {}
+        self._sizes: dict[NSID, int] = {} # Nombre de trigrammes de chaque nom
+        self._lock: threading.RLock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, id: NSID, name: str, _type: str) -> None:
+        """
+        Ajoute ou met à jour une entité dans l'index.
+
+        ## Paramètres
+        id: `NSID`\n
+            ID de l'entité
+        name: `str`\n
+            Nom de l'entité
+        _type: `str`\n
+            Type de l'entité (`individual` ou `organization`)
+        """
+
+        id = NSID(id)
+
+        with self._lock:
+            if id in self.entries:
+                self.remove(id)
+
+            for word in self._insert(id, name, _type):
+                bisect.insort(self._words, (word, id))
+
+    def add_many(self, entities: typing.Iterable[tuple[NSID, str, str]]) -> None:
+        """
+        Ajoute ou met à jour plusieurs entités dans l'index. Les mots sont triés en une seule fois, ce qui est bien plus rapide que des `add` successifs pour construire un index.
+
+        ## Paramètres
+        entities: `Iterable[tuple[NSID, str, str]]`\n
+            `(ID, nom, type)` de chaque entité
+        """
+
+        entities = { NSID(id): (name, _type) for id, name, _type in entities }
+        words = []
+
+        with self._lock:
+            for id, (name, _type) in entities.items():
+                if id in self.entries:
+                    self.remove(id)
+
+                words.extend((word, id) for word in self._insert(id, name, _type))
+
+            self._words.extend(words)
+            self._words.sort()
+
+    def _insert(self, id: NSID, name: str, _type: str) -> set[str]:
+        # Enregistre l'entité et ses trigrammes, et renvoie les mots à placer dans self._words
+        normalized = _normalize(name)
+        self.entries[id] = (name, _type, normalized)
+
+        trigrams = _trigrams(normalized)
+        self._sizes[id] = len(trigrams)
+
+        for trigram in trigrams:
+            self._trigrams.setdefault(trigram, set()).add(id)
+
+        return set(normalized.split())
+
+    def remove(self, id: NSID) -> None:
+        """
+        Retire une entité de l'index.
+        """
+
+        id = NSID(id)
+
+        with self._lock:
+            if id not in self.entries:
+                return
+
+            normalized = self.entries.pop(id)[2]
+            del self._sizes[id]
+
+            for word in set(normalized.split()):
+                i = bisect.bisect_left(self._words, (word, id))
+
+                if i < len(self._words) and self._words[i] == (word, id):
+                    del self._words[i]
+
+            for trigram in _trigrams(normalized):
+                ids = self._trigrams.get(trigram)
+
+                if ids is not None:
+                    ids.discard(id)
+
+                    if not ids:
+                        del self._trigrams[trigram]
+
+    def search(self, query: str, limit: int = 25, min_score: float = 0.3) -> list[tuple[NSID, str, str]]:
+        """
+        Recherche des entités par leur nom.\n
+        La recherche par préfixe s'arrête dès que `limit` noms identiques ou commençant par la recherche ont été trouvés, la recherche approximative n'est faite que s'il manque des résultats.
+
+        ## Paramètres
+        query: `str`\n
+            Texte recherché
+        limit: `int`\n
+            Nombre maximal de résultats
+        min_score: `float`\n
+            Ressemblance minimale (entre 0 et 1) pour les résultats approximatifs
+
+        ## Renvoie
+        - `list[tuple[NSID, str, str]]`: `(ID, nom, type)` des entités trouvées, de la plus pertinente à la moins pertinente
+        """
+
+        query = _normalize(query)
+
+        if not query:
+            return []
+
+        with self._lock:
+            return self._search(query, limit, min_score)
+
+    def _search(self, query: str, limit: int, min_score: float) -> list[tuple[NSID, str, str]]:
+        scores: dict[NSID, float] = {}
+        hits = 0 # Noms identiques ou commençant par la recherche
+
+        # Recherche par préfixe sur chacun des mots des noms
+        i = bisect.bisect_left(self._words, (query,))
+
+        while hits < limit and i < len(self._words) and self._words[i][0].startswith(query):
+            id = self._words[i][1]
+            i += 1
+
+            if id in scores:
+                continue
+
+            name = self.entries[id][2]
+            scores[id] = 3.0 if name == query else 2.0 if name.startswith(query) else 1.0
+
+            if scores[id] > 1.0:
+                hits += 1
+
+        if len(scores) >= limit: # Les résultats approximatifs seraient classés après
+            return self._rank(scores, limit)
+
+        # Recherche approximative
+        trigrams = _trigrams(query)
+        shared: dict[NSID, int] = {}
+
+        for trigram in trigrams:
+            for id in self._trigrams.get(trigram, ()):
+                shared[id] = shared.get(id, 0) + 1
+
+        for id, count in shared.items():
+            if id in scores:
+                continue
+
+            score = count / (len(trigrams) + self._sizes[id] - count)
+
+            if score >= min_score:
+                scores[id] = score
+
+        return self._rank(scores, limit)
+
+    def _rank(self, scores: dict[NSID, float], limit: int) -> list[tuple[NSID, str, str]]:
+        ranked = sorted(scores, key = lambda id : (-scores[id], len(self.entries[id][0]), self.entries[id][0]))
+
+        return [ (id, *self.entries[id][:2]) for id in ranked[:limit] ]
@@ -0,0 +1,148 @@
+"""
+Flux des modifications de la base, pour garder les caches locaux des instances à jour.
+
+Une instance reliée à un flux (`Instance.attach_feed`) invalide ou met à jour ses caches (items, meilleures offres, résultats des votes, index des noms...) à chaque modification d'une table qu'elle suit, même si la modification vient d'un autre processus.
+
+- `ChangeFeed` distribue les évènements qu'on lui publie, dans le même processus. Il sert de remplaçant local, notamment pour les tests.
+- `RealtimeChangeFeed` reçoit les évènements depuis le canal Realtime de Supabase (la réplication doit être activée sur les tables suivies).
+"""
+
+import threading
+import typing
+
+class ChangeEvent:
+    """
+    Modification d'une ligne d'une table
+
+    ## Attributs
+    - table: `str`\n
+        Nom de la table
+    - type: `str`\n
+        Type de modification (`INSERT`, `UPDATE` ou `DELETE`)
+    - record: `dict`\n
+        Nouvelle version de la ligne (vide pour `DELETE`)
+    - old_record: `dict`\n
+        Ancienne version de la ligne (souvent limitée à la clé primaire)
+    """
+
+    def __init__(self, table: str, type: str, record: dict = None, old_record: dict = None) -> None:
+        self.table: str = table
+        self.type: str = type.upper()
+        self.record: dict = record or {}
+        self.old_record: dict = old_record or {}
+
+    @property
+    def id(self) -> typing.Any:
+        return self.record.get('id', self.old_record.get('id'))
+
+class ChangeFeed:
+    """
+    Flux de modifications local: chaque évènement publié est transmis aux fonctions abonnées à sa table.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, list[typing.Callable[[ChangeEvent], None]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, table: str, callback: typing.Callable[[ChangeEvent], None]) -> None:
+        """
+        Abonne une fonction aux modifications d'une table.
+        """
+
+        with self._lock:
+            self._subscribers.setdefault(table, []).append(callback)
+
+    def publish(self, event: ChangeEvent) -> None:
+        """
+        Transmet un évènement aux fonctions abonnées à sa table.
+        """
+
+        with self._lock:
+            callbacks = list(self._subscribers.get(event.table, []))
+
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as err:
+                print(f"Erreur lors du traitement d'une modification de '{event.table}':", err)
+
+class RealtimeChangeFeed(ChangeFeed):
+    """
+    Flux de modifications alimenté par le canal Realtime de Supabase.\n
+    La connexion tourne dans un thread dédié. Les tables sont écoutées à partir de leur premier abonné.
+
+    ## Paramètres
+    id: `str`\n
+        ID du projet Supabase
+    token: `str`\n
+        Clé d'accès au projet
+    schema: `str`\n
+        Schéma des tables suivies
+    """
+
+    def __init__(self, id: str, token: str, schema: str = 'public') -> None:
+        super().__init__()
+
+        import asyncio # Importés ici: asyncio et realtime sont lents à charger et inutiles sans flux temps réel
+        from realtime import AsyncRealtimeClient
+
+        self.schema: str = schema
+        self._client = AsyncRealtimeClient(f"wss://{id}.supabase.co/realtime/v1", token)
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+        self._error: Exception = None
+
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+        self._ready.wait()
+
+        if self._error is not None:
+            raise self._error
+
+    def subscribe(self, table: str, callback: typing.Callable[[ChangeEvent], None]) -> None:
+        first = table not in self._subscribers
+        super().subscribe(table, callback)
+
+        if first:
+            import asyncio
+
+            asyncio.run_coroutine_threadsafe(self._listen(table), self._loop).result()
+
+    def close(self) -> None:
+        """Ferme la connexion au canal Realtime."""
+
+        import asyncio
+
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _on_payload(self, payload: dict) -> None:
+        _data = payload['data']
+        self.publish(ChangeEvent(_data['table'], _data['type'], _data.get('record'), _data.get('old_record')))
+
+    async def _listen(self, table: str) -> None:
+        channel = self._client.channel(f"nsarchive:{table}")
+        channel.on_postgres_changes('*', callback = self._on_payload, table = table, schema = self.schema)
+
+        await channel.subscribe()
+
+    async def _connect(self) -> None:
+        await self._client.connect()
+        self._loop.create_task(self._client.listen())
+
+    def _run(self) -> None:
+        import asyncio
+
+        asyncio.set_event_loop(self._loop)
+
+        try:
+            self._loop.run_until_complete(self._connect())
+        except Exception as err:
+            self._error = err
+            return
+        finally:
+            self._ready.set()
+
+        self._loop.run_forever()
@@ -1,4 +1,5 @@
 import time
+import typing
 
 from supabase import create_client
 
@@ -11,9 +12,44 @@ from ..cls.exceptions import *
 class EconomyInstance(Instance):
     """Gère les interactions avec les comptes bancaires, les transactions, et le marché."""
 
+    _feed_tables = ('items', 'market')
+
     def __init__(self, id: str, token: str) -> None:
         super().__init__(create_client(f"https://{id}.supabase.co", token))
 
+        self._items: dict[NSID, Item] = {} # Catalogue des items déjà récupérés
+        self._book: dict[NSID, tuple[float, Sale]] = {} # Meilleure offre par item et date de sa récupération
+        self.book_ttl: int = 5 # Durée (en secondes) pendant laquelle une meilleure offre en cache est considérée comme à jour
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.table == 'items':
+            if event.type == 'DELETE':
+                self._items.pop(NSID(event.id), None)
+            else:
+                item = Item(event.record['id'])
+                item.title = event.record['title']
+                item.emoji = event.record['emoji']
+
+                self._items[item.id] = item
+        elif event.table == 'market':
+            items = { _data['item'] for _data in (event.record, event.old_record) if 'item' in _data }
+
+            if items:
+                self._forget_asks(*items)
+            else: # Suppression sans l'ancienne ligne complète: on ne sait pas quel item est concerné
+                self._forget_asks()
+
+    def _forget_asks(self, *items: NSID) -> None:
+        # Retire les meilleures offres en cache (toutes si aucun item n'est donné). Les requêtes en cours ne remettront pas en cache une offre lue avant.
+        with self._lock:
+            self._changes += 1
+
+            if not items:
+                self._book.clear()
+
+            for item in items:
+                self._book.pop(NSID(item), None)
+
     """
     ---- COMPTES EN BANQUE ----
     """
@@ -36,7 +72,10 @@ class EconomyInstance(Instance):
         if _data is None:
             return None
 
-        account = BankAccount(id)
+        return self._account_from_data(_data)
+
+    def _account_from_data(self, _data: dict) -> BankAccount:
+        account = BankAccount(_data['id'])
         account.amount = _data['amount']
         account.frozen = _data['frozen']
         account.owner = NSID(_data['owner_id'])
@@ -45,6 +84,68 @@ class EconomyInstance(Instance):
 
         return account
 
+    def get_accounts(self, owner: NSID) -> list[BankAccount]:
+        """
+        Récupère tous les comptes bancaires d'une entité.
+
+        ## Paramètres
+        owner: `NSID`\n
+            ID du titulaire des comptes
+
+        ## Renvoie
+        - `list[.BankAccount]`
+        """
+
+        return [ self._account_from_data(_data) for _data in self._select_many('accounts', owner_id = NSID(owner)) ]
+
+    def get_wealth(self, owners: list[NSID]) -> dict[NSID, int]:
+        """
+        Calcule la fortune totale (somme de tous les comptes) de plusieurs entités.\n
+        Les sommes sont calculées côté serveur par la fonction `wealth_by_owner(owners, n)` (voir `instances/sql/economy.sql`), qui renvoie une ligne `{ owner_id, total }` par titulaire.
+
+        ## Paramètres
+        owners: `list[NSID]`\n
+            IDs des titulaires
+
+        ## Renvoie
+        - `dict[NSID, int]` indexé par titulaire (`0` pour ceux qui n'ont aucun compte)
+        """
+
+        owners = NSID.many(owners)
+        wealth = { owner: 0 for owner in owners }
+
+        if owners:
+            for _data in self._call_rpc('wealth_by_owner', { 'owners': owners, 'n': None }) or []:
+                wealth[NSID(_data['owner_id'])] = _data['total']
+
+        return wealth
+
+    def get_richest(self, limit: int = 10) -> list[tuple[NSID, int]]:
+        """
+        Récupère les entités les plus riches, toutes banques confondues.
+
+        ## Paramètres
+        limit: `int`\n
+            Nombre d'entités à renvoyer
+
+        ## Renvoie
+        - `list[tuple[NSID, int]]`: Couples `(titulaire, fortune)` de la plus riche à la moins riche
+        """
+
+        _res = self._call_rpc('wealth_by_owner', { 'owners': None, 'n': limit }) or []
+
+        return [ (NSID(_data['owner_id']), _data['total']) for _data in _res ]
+
+    def get_bank_totals(self) -> dict[NSID, int]:
+        """
+        Calcule la somme détenue par chaque banque, via la fonction `wealth_by_bank()` côté serveur (voir `instances/sql/economy.sql`).
+
+        ## Renvoie
+        - `dict[NSID, int]` indexé par banque
+        """
+
+        return { NSID(_data['bank']): _data['total'] for _data in self._call_rpc('wealth_by_bank') or [] }
+
     def save_account(self, account: BankAccount):
         """
         Sauvegarde un compte bancaire dans la base de données.
@@ -79,6 +180,155 @@ class EconomyInstance(Instance):
 
         self.save_account(account)
 
+    def reset_incomes(self, **query: typing.Any) -> int:
+        """
+        Remet à zéro les revenus (`income`) de tous les comptes correspondant à la requête, en une seule requête.
+
+        ## Paramètres
+        query: `dict`\n
+            Filtres sur les comptes (tous les comptes si vide)
+
+        ## Renvoie
+        - `int`: Nombre de comptes modifiés
+        """
+
+        return self._update_in_db('accounts', { 'income': 0 }, income__neq = 0, **query) # Seuls les comptes à réinitialiser sont modifiés
+
+    def apply_rate(self, rate: float, **query: typing.Any) -> int:
+        """
+        Applique un taux d'intérêt (positif) ou une taxe (négatif) aux comptes non gelés correspondant à la requête.\n
+        Le calcul est fait côté serveur par la fonction `apply_rate(rate, filters)` (voir `instances/sql/economy.sql`), qui renvoie le nombre de comptes modifiés. Les sommes sont arrondies vers zéro (une taxe ne dépasse jamais son taux) et chaque modification est archivée comme une `.Transaction` entre le compte et sa banque.
+
+        ## Paramètres
+        rate: `float`\n
+            Taux à appliquer, en pourcentage (`-5` = taxe de 5%)
+        query: `dict`\n
+            Filtres sur les comptes (tous les comptes si vide). Comme pour `_filter`, une `list` ou un `tuple` vérifie l'appartenance et toute autre valeur l'égalité. Les comparaisons (`__gt`...) et `or_` ne sont pas acceptées.
+
+        ## Renvoie
+        - `int`: Nombre de comptes modifiés
+        """
+
+        filters = {}
+
+        for key, value in query.items():
+            if '__' in key or key == 'or_':
+                raise ValueError(f"apply_rate only accepts equality and membership filters, got {key}.")
+
+            filters[key] = list(value) if isinstance(value, (list, tuple)) else value
+
+        return self._call_rpc('apply_rate', { 'rate': rate, 'filters': filters }) or 0
+
+    def freeze_accounts(self, ids: list[NSID] = None, frozen: bool = True, **query: typing.Any) -> int:
+        """
+        Gèle ou dégèle plusieurs comptes en une seule requête.
+
+        ## Paramètres
+        ids: `list[NSID]`\n
+            IDs des comptes (facultatif)
+        frozen: `bool`\n
+            `True` pour geler les comptes, `False` pour les dégeler
+        query: `dict`\n
+            Filtres supplémentaires sur les comptes
+
+        ## Renvoie
+        - `int`: Nombre de comptes modifiés
+        """
+
+        if ids is not None:
+            query['id'] = NSID.many(ids)
+
+        return self._update_in_db('accounts', { 'frozen': frozen }, frozen__neq = frozen, **query)
+
+    def transfer(self, author: NSID, target: NSID, amount: int, reason: str = None) -> Transaction:
+        """
+        Transfère de l'argent d'un compte à un autre en une seule requête atomique.
+
+        ## Paramètres
+        author: `NSID`\n
+            ID du compte débité
+        target: `NSID`\n
+            ID du compte crédité
+        amount: `int`\n
+            Somme à transférer
+        reason: `str`\n
+            Motif du transfert
+
+        ## Renvoie
+        - `.Transaction`: L'archive du transfert
+
+        ## Erreurs
+        - Voir `transfer_many`
+        """
+
+        return self.transfer_many([ (author, target, amount, reason) ])[0]
+
+    def transfer_many(self, transfers: list[tuple[NSID, NSID, int, str]]) -> list[Transaction]:
+        """
+        Effectue plusieurs transferts dans une seule transaction côté serveur (fonction `transfer_many(transfers)`, voir `instances/sql/economy.sql`).\n
+        Pour chaque transfert, le serveur vérifie que les comptes existent, ne sont pas gelés et que le solde du compte débité est suffisant, puis met à jour `amount` et `income` et enregistre l'archive `.Transaction`. Si un seul transfert échoue, aucun n'est appliqué.
+
+        ## Paramètres
+        transfers: `list[tuple[NSID, NSID, int, str]]`\n
+            Transferts à effectuer, sous la forme `(compte débité, compte crédité, somme, motif)`
+
+        ## Renvoie
+        - `list[.Transaction]`: Les archives des transferts, dans le même ordre
+
+        ## Erreurs
+        - `.RessourceNotFoundError` si un compte n'existe pas
+        - `.AccountFrozenError` si un compte est gelé
+        - `.InsufficientFundsError` si un compte n'a pas assez d'argent
+        """
+
+        base = time.time_ns() // 1000 * 16 ** 4 # Date en microsecondes, suivie de l'index du transfert
+        archives = []
+
+        for i, (author, target, amount, reason) in enumerate(transfers):
+            if amount <= 0:
+                raise ValueError(f"Transfer amount must be positive, got {amount}.")
+
+            archive = Transaction(author, target)
+            archive.id = NSID(base + i)
+            archive.action = "transfer"
+            archive.details['amount'] = amount
+            archive.details['reason'] = reason
+
+            archives.append(archive)
+
+        if not archives:
+            return []
+
+        _data = [ dict(archive.__dict__, _type = "transaction") for archive in archives ]
+        _res = self._call_rpc('transfer_many', { 'transfers': _data })
+        self._raise_rpc_error('transfer_many', _res)
+
+        return archives
+
+    def _raise_rpc_error(self, function: str, _res: typing.Any):
+        """
+        Vérifie le résultat d'une fonction qui déplace de l'argent (`transfer_many`, `buy_sale`, `buy_cheapest`) et lève l'erreur correspondante en cas d'échec.\n
+        Ces fonctions renvoient toujours un objet, qui contient `error` et l'ID concerné en cas d'échec (voir `instances/sql/economy.sql`).
+        """
+
+        if not isinstance(_res, dict):
+            raise RuntimeError(f"Unexpected result from {function}: {_res!r} (see instances/sql/economy.sql)")
+
+        error = _res.get('error')
+
+        if error is None:
+            return
+        elif error == 'frozen':
+            raise AccountFrozenError(f"Account <{_res['account']}> is frozen.")
+        elif error == 'funds':
+            raise InsufficientFundsError(f"Account <{_res['account']}> has insufficient funds.")
+        elif error == 'sale':
+            raise RessourceNotFoundError(f"Sale <{_res['sale']}> not found, sold out or owned by the buyer.")
+        elif error == 'not_found':
+            raise RessourceNotFoundError(f"Account <{_res['account']}> not found.")
+        else:
+            raise RuntimeError(f"Unknown error from {function}: {error!r}")
+
     """
     ---- OBJETS & VENTES ----
     """
@@ -92,9 +342,14 @@ class EconomyInstance(Instance):
             Article à sauvegarder
         """
 
+        item.id = NSID(item.id)
+
         _item = item.__dict__
         self._put_in_db('items', _item)
 
+        with self._lock:
+            self._items[item.id] = item
+
     def get_item(self, id: NSID) -> Item | None:
         """
         Récupère des informations à propos d'un item.
@@ -108,16 +363,43 @@ class EconomyInstance(Instance):
         - `None`
         """
 
-        _item = self._get_by_ID('items', id)
+        id = NSID(id)
 
-        if _item is None:
-            return
+        return self.get_items([ id ]).get(id)
 
-        item = Item(id)
-        item.title = _item['title']
-        item.emoji = _item['emoji']
+    def get_items(self, ids: list[NSID]) -> dict[NSID, Item]:
+        """
+        Récupère plusieurs items. Ceux qui ne sont pas encore dans le catalogue local sont récupérés en une seule requête.
 
-        return item
+        ## Paramètres
+        ids: `list[NSID]`\n
+            IDs des items
+
+        ## Retourne
+        - `dict[NSID, .Item]` des items trouvés, indexés par ID
+        """
+
+        ids = NSID.many(ids)
+
+        with self._lock:
+            found = { id: self._items[id] for id in ids if id in self._items }
+            changes = self._changes
+
+        missing = [ id for id in ids if id not in found ]
+
+        if missing:
+            for _item in self._select_many('items', id = missing):
+                item = Item(_item['id'])
+                item.title = _item['title']
+                item.emoji = _item['emoji']
+
+                found[item.id] = item
+
+            with self._lock:
+                if self._changes == changes: # Sinon le flux a pu modifier un de ces items pendant la requête
+                    self._items.update((id, found[id]) for id in missing if id in found)
+
+        return { id: found[id] for id in ids if id in found }
 
     def delete_item(self, item: Item):
         """
@@ -130,6 +412,17 @@ class EconomyInstance(Instance):
 
         self._delete_by_ID('items', item.id)
 
+        with self._lock:
+            self._items.pop(NSID(item.id), None)
+
+    def _sale_from_data(self, _data: dict) -> Sale:
+        sale = Sale(NSID(_data['id']), Item(_data['item']))
+        sale.quantity = _data['quantity']
+        sale.price = _data['price']
+        sale.seller_id = NSID(_data['seller_id'])
+
+        return sale
+
     def get_sale(self, id: NSID) -> Sale | None:
         """
         Récupère une vente disponible sur le marketplace.
@@ -149,12 +442,7 @@ class EconomyInstance(Instance):
         if _data is None:
             return None
 
-        item = self.get_item(_data['id'])
-
-        sale = Sale(NSID(id), Item(_data['id']) if item is None else item)
-        sale.__dict__ = _data
-
-        return sale
+        return self._sale_from_data(_data)
 
     def sell_item(self, item: Item, quantity: int, price: int, seller: NSID):
         """
@@ -179,12 +467,228 @@ class EconomyInstance(Instance):
         _data = sale.__dict__.copy()
 
         self._put_in_db('market', _data)
+        self._forget_asks(sale.item)
 
     def delete_sale(self, sale: Sale) -> None:
         """Annule une vente sur le marketplace."""
 
         sale.id = NSID(sale.id)
         self._delete_by_ID('market', NSID(sale.id))
+        self._forget_asks(NSID(sale.item))
+
+    def buy(self, sale: NSID, buyer: NSID, quantity: int = 1, partial: bool = False) -> tuple[int, int]:
+        """
+        Achète tout ou partie d'une vente en une seule transaction côté serveur (fonction `buy_sale(sale, buyer, quantity, partial)`, voir `instances/sql/economy.sql`).\n
+        Les comptes de l'acheteur et du vendeur puis la vente sont verrouillés le temps de l'achat, dans le même ordre que les autres fonctions qui modifient des soldes (pas d'interblocage entre deux achats simultanés). Le serveur débite le compte principal de l'acheteur, crédite celui du vendeur, enregistre l'archive `.Transaction`, ajoute les objets à l'inventaire de l'acheteur puis réduit la quantité de la vente (ou la supprime si elle est épuisée).
+
+        ## Paramètres
+        sale: `NSID`\n
+            ID de la vente
+        buyer: `NSID`\n
+            ID de l'acheteur
+        quantity: `int`\n
+            Nombre d'objets à acheter
+        partial: `bool`\n
+            Accepter d'acheter moins d'objets que demandé si la vente n'en a plus assez
+
+        ## Renvoie
+        - `tuple[int, int]`: Nombre d'objets achetés et prix total payé
+
+        ## Erreurs
+        - `.RessourceNotFoundError` si la vente n'existe pas, n'a plus assez d'objets (sans `partial`), appartient à l'acheteur ou si un compte n'existe pas
+        - `.AccountFrozenError` si le compte de l'acheteur ou du vendeur est gelé
+        - `.InsufficientFundsError` si l'acheteur n'a pas assez d'argent
+        """
+
+        if quantity <= 0:
+            raise ValueError(f"Quantity must be positive, got {quantity}.")
+
+        _res = self._call_rpc('buy_sale', {
+            'sale': NSID(sale),
+            'buyer': NSID(buyer),
+            'quantity': quantity,
+            'partial': partial
+        })
+
+        self._raise_rpc_error('buy_sale', _res)
+        self._forget_asks(NSID(_res['item']))
+
+        return _res['quantity'], _res['cost']
+
+    def buy_cheapest(self, item: NSID, buyer: NSID, quantity: int, max_price: int = None) -> tuple[int, int]:
+        """
+        Achète un item en parcourant les ventes de la moins chère à la plus chère, en une seule transaction côté serveur (fonction `buy_cheapest(item, buyer, quantity, max_price)`, voir `instances/sql/economy.sql`).\n
+        La dernière vente utilisée peut n'être que partiellement achetée. L'achat s'arrête quand la quantité est atteinte, quand il n'y a plus de vente sous `max_price` ou quand l'acheteur n'a plus assez d'argent pour l'objet suivant. Les ventes de l'acheteur sont ignorées.\n
+        Les ventes retenues et les comptes concernés sont verrouillés avant l'achat: si un autre achat simultané vide une de ces ventes, la quantité obtenue peut être inférieure à celle disponible.
+
+        ## Paramètres
+        item: `NSID`\n
+            ID de l'item
+        buyer: `NSID`\n
+            ID de l'acheteur
+        quantity: `int`\n
+            Nombre maximal d'objets à acheter
+        max_price: `int`\n
+            Prix à l'unité maximal accepté (facultatif)
+
+        ## Renvoie
+        - `tuple[int, int]`: Nombre d'objets achetés et prix total payé
+
+        ## Erreurs
+        - `.RessourceNotFoundError` si le compte de l'acheteur n'existe pas
+        - `.AccountFrozenError` si le compte de l'acheteur est gelé
+        """
+
+        if quantity <= 0:
+            raise ValueError(f"Quantity must be positive, got {quantity}.")
+
+        item = NSID(item)
+
+        _res = self._call_rpc('buy_cheapest', {
+            'item': item,
+            'buyer': NSID(buyer),
+            'quantity': quantity,
+            'max_price': max_price
+        })
+
+        self._raise_rpc_error('buy_cheapest', _res)
+        self._forget_asks(item)
+
+        return _res['quantity'], _res['cost']
+
+    def clean_market(self, chunk_size: int = 500) -> dict[str, int | float]:
+        """
+        Supprime du marketplace les ventes épuisées et celles des vendeurs dont le compte principal (celui de plus petit ID, utilisé par les achats) est gelé.\n
+        Les suppressions sont faites par filtres côté serveur (par lots de `chunk_size` vendeurs) et les comptes sont parcourus page par page, donc aucune liste n'est tronquée par la limite de lignes de PostgREST. Peut être appelée régulièrement par une tâche planifiée.
+
+        ## Paramètres
+        chunk_size: `int`\n
+            Nombre maximal de vendeurs par requête
+
+        ## Renvoie
+        - `dict`: Nombre de ventes supprimées (`removed`) et durée de l'opération en secondes (`duration`)
+        """
+
+        start = time.perf_counter()
+        chunks = lambda values : [ values[i:i + chunk_size] for i in range(0, len(values), chunk_size) ]
+
+        removed = self._delete_many('market', quantity__lte = 0)
+
+        # Titulaires d'au moins un compte gelé, puis ceux dont le compte principal est gelé
+        owners = list({ _data['owner_id'] for page in self._stream_from_db('accounts', 'id, owner_id', frozen = True) for _data in page })
+        main: dict[str, tuple] = {}
+
+        for chunk in chunks(owners):
+            for page in self._stream_from_db('accounts', 'id, owner_id, frozen', owner_id = chunk):
+                for _data in page:
+                    key = (len(_data['id']), _data['id'])
+
+                    if _data['owner_id'] not in main or key < main[_data['owner_id']][0]:
+                        main[_data['owner_id']] = (key, _data['frozen'])
+
+        sellers = [ owner for owner, (_, frozen) in main.items() if frozen ]
+
+        for chunk in chunks(sellers):
+            removed += self._delete_many('market', seller_id = chunk)
+
+        if removed:
+            self._forget_asks()
+
+        return {
+            'removed': removed,
+            'duration': time.perf_counter() - start
+        }
+
+    def get_sales(self, item: NSID, limit: int = 25, offset: int = 0) -> list[Sale]:
+        """
+        Récupère les ventes d'un item, de la moins chère à la plus chère.
+
+        ## Paramètres
+        item: `NSID`\n
+            ID de l'item
+        limit: `int`\n
+            Nombre de ventes par page
+        offset: `int`\n
+            Nombre de ventes à sauter
+
+        ## Renvoie
+        - `list[.Sale]`
+        """
+
+        _res = self._select_many('market', order = ('price', 'id'), limit = limit, offset = offset, item = NSID(item), quantity__gt = 0) # L'ID départage les ventes au même prix, pour des pages stables
+
+        return [ self._sale_from_data(_data) for _data in _res ]
+
+    def get_best_ask(self, item: NSID) -> Sale | None:
+        """
+        Récupère la vente la moins chère d'un item.\n
+        Le résultat est gardé en cache pendant `book_ttl` secondes.
+
+        ## Paramètres
+        item: `NSID`\n
+            ID de l'item
+
+        ## Renvoie
+        - `.Sale | None`
+        """
+
+        return self.get_best_asks([ item ]).get(NSID(item))
+
+    def get_best_asks(self, items: list[NSID]) -> dict[NSID, Sale | None]:
+        """
+        Récupère la vente la moins chère de plusieurs items.\n
+        Les items absents du cache sont récupérés en une seule requête via la fonction `best_asks(items)` (voir `instances/sql/economy.sql`), qui renvoie la vente la moins chère de chaque item.
+
+        ## Paramètres
+        items: `list[NSID]`\n
+            IDs des items
+
+        ## Renvoie
+        - `dict[NSID, .Sale | None]` indexé par ID d'item
+        """
+
+        items = NSID.many(items)
+        now = time.time()
+
+        with self._lock:
+            cached = { item: self._book.get(item, (0, None)) for item in items }
+            changes = self._changes
+
+        result = { item: sale for item, (date, sale) in cached.items() if now - date < self.book_ttl }
+        missing = [ item for item in items if item not in result ]
+
+        if missing:
+            asks = { NSID(_data['item']): self._sale_from_data(_data) for _data in self._call_rpc('best_asks', { 'items': missing }) or [] }
+
+            with self._lock:
+                for item in missing:
+                    result[item] = asks.get(item)
+
+                    if self._changes == changes: # Sinon le flux a pu invalider cette offre pendant la requête
+                        self._book[item] = (now, result[item])
+
+        return { item: result[item] for item in items }
+
+    def get_market_depth(self, item: NSID, limit: int = 100) -> list[tuple[int, int]]:
+        """
+        Récupère la profondeur du marché d'un item: la quantité disponible à chaque prix.
+
+        ## Paramètres
+        item: `NSID`\n
+            ID de l'item
+        limit: `int`\n
+            Nombre maximal de ventes (les moins chères) prises en compte
+
+        ## Renvoie
+        - `list[tuple[int, int]]`: Couples `(prix, quantité)` du moins cher au plus cher
+        """
+
+        depth: dict[int, int] = {}
+
+        for _data in self._select_many('market', 'price, quantity', order = ('price', 'id'), limit = limit, item = NSID(item), quantity__gt = 0):
+            depth[_data['price']] = depth.get(_data['price'], 0) + _data['quantity']
+
+        return list(depth.items())
 
     """
     ---- INVENTAIRES ----
@@ -202,17 +706,16 @@ class EconomyInstance(Instance):
         - `.Inventory | None`: L'inventaire s'il a été trouvé
         """
 
+        id = NSID(id)
         _data = self._get_by_ID('inventories', id)
 
         if _data is None:
             return None
 
         inventory = Inventory(id)
+        inventory.objects = { NSID(item): quantity for item, quantity in _data['objects'].items() }
 
-        for _item in _data['objects']:
-            item = self.get_item(_item)
-
-            inventory.objects.append(item)
+        self.get_items(inventory.objects.keys()) # Le catalogue des objets de l'inventaire est chargé en une seule requête
 
         return inventory
 
@@ -225,7 +728,11 @@ class EconomyInstance(Instance):
             Inventaire à sauvegarder
         """
 
-        _data = inventory.__dict__
+        _data = {
+            'id': NSID(inventory.owner_id),
+            'owner_id': NSID(inventory.owner_id),
+            'objects': { NSID(item): quantity for item, quantity in inventory.objects.items() }
+        }
 
         self._put_in_db('inventories', _data)
 
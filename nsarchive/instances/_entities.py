@@ -1,8 +1,15 @@
+import atexit
+import heapq
+import itertools
+import threading
+import time
+
 from supabase import create_client
 
 from ..cls.base import *
 from ..cls.entities import *
 from ..cls.archives import *
+from ..cls.search import NameIndex
 
 from ..cls.exceptions import *
 
@@ -18,9 +25,29 @@ class EntityInstance(Instance):
     - Sanctions et modifications d'une entité: `.Action[ .AdminAction | .Sanction ]`
     """
 
+    _feed_tables = ('individuals', 'organizations', 'archives')
+
     def __init__(self, id: str, token: str) -> None:
         super().__init__(create_client(f"https://{id}.supabase.co", token))
 
+        self._names: NameIndex = None # Index des noms, construit à la première recherche
+        self._sanctions: SanctionScheduler = None
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.table == 'archives':
+            if self._sanctions is not None and event.type == 'INSERT' and event.record.get('_type') == 'sanction':
+                self._sanctions.add(self._archive_from_data(event.record))
+
+            return
+
+        super()._on_change(event)
+
+        if self._names is not None:
+            if event.type == 'DELETE':
+                self._names.remove(event.id)
+            elif 'name' in event.record and self._names.entries.get(NSID(event.id), (None,))[0] != event.record['name']: # Les modifications sans changement de nom (ex: XP) ne touchent pas l'index
+                self._names.add(event.id, event.record['name'], 'individual' if event.table == 'individuals' else 'organization')
+
     """
     ---- ENTITÉS ----
     """
@@ -41,16 +68,13 @@ class EntityInstance(Instance):
 
         id = NSID(id)
 
-        _data = self._get_by_ID('individuals', id)
-
-        if _data is None: # Aucune entité individuelle sous cet ID
-            _data = self._get_by_ID('organizations', id) # On cherche du côté des groupes
-        else:
-            _data['_type'] = 'user'
+        table, _data = self._locate_by_ID([ 'individuals', 'organizations' ], id)
 
         if _data is None: # ID inexistant chez les entités
             return None
-        elif '_type' not in _data.keys(): # S'il existe chez les organisations, clé '_type' pas encore initialisée
+        elif table == 'individuals':
+            _data['_type'] = 'user'
+        else:
             _data['_type'] = 'organization'
 
         if _data['_type'] == 'user':
@@ -59,7 +83,7 @@ class EntityInstance(Instance):
             entity.xp = _data['xp']
             entity.boosts = _data['boosts']
 
-            entity.votes = [ NSID(vote) for vote in _data['votes'] ]
+            entity.votes = set(NSID.many(_data['votes']))
         elif _data['_type'] == 'organization':
             entity = Organization(id)
 
@@ -148,9 +172,15 @@ class EntityInstance(Instance):
         elif type(entity) == User:
             _data['xp'] = entity.xp
             _data['boosts'] = entity.boosts
-            _data['votes'] = [ NSID(vote) for vote in entity.votes]
+            _data['votes'] = NSID.many(entity.votes)
+
+        table = 'individuals' if isinstance(entity, User) else 'organizations'
 
-        self._put_in_db('individuals' if isinstance(entity, User) else 'organizations', _data)
+        self._put_in_db(table, _data)
+        self._locations[entity.id] = table
+
+        if self._names is not None:
+            self._names.add(entity.id, entity.name, 'individual' if table == 'individuals' else 'organization')
 
     def delete_entity(self, entity: Entity):
         """
@@ -162,6 +192,10 @@ class EntityInstance(Instance):
         """
 
         self._delete_by_ID('individuals' if isinstance(entity, User) else 'organizations', NSID(entity.id))
+        self._locations.pop(NSID(entity.id), None)
+
+        if self._names is not None:
+            self._names.remove(entity.id)
 
     def fetch_entities(self, **query: typing.Any) -> list[ Entity | User | Organization ]:
         """
@@ -192,6 +226,101 @@ class EntityInstance(Instance):
 
         return [ self.get_entity(NSID(entity['id'])) for entity in _res if entity is not None ]
 
+    def build_name_index(self, page_size: int = 1000) -> NameIndex:
+        """
+        Construit (ou reconstruit) l'index des noms d'entités utilisé par `search_entities`.\n
+        Seuls l'ID et le nom des membres et des organisations sont récupérés, page par page, puis triés en une seule fois. L'index est ensuite tenu à jour par `save_entity` et `delete_entity`.
+
+        ## Paramètres
+        page_size: `int`\n
+            Nombre d'entités par requête
+
+        ## Renvoie
+        - `.NameIndex`
+        """
+
+        index = NameIndex()
+        index.add_many(
+            (_data['id'], _data['name'], _type)
+            for table, _type in (('individuals', 'individual'), ('organizations', 'organization'))
+            for page in self._stream_from_db(table, 'id, name', page_size = page_size)
+            for _data in page
+        )
+
+        self._names = index
+
+        return index
+
+    def search_entities(self, query: str, limit: int = 25) -> list[tuple[NSID, str, str]]:
+        """
+        Recherche des entités par leur nom (préfixe ou ressemblance), sans requête vers la base une fois l'index construit.
+
+        ## Paramètres
+        query: `str`\n
+            Texte recherché
+        limit: `int`\n
+            Nombre maximal de résultats
+
+        ## Renvoie
+        - `list[tuple[NSID, str, str]]`: `(ID, nom, type)` des entités trouvées, de la plus pertinente à la moins pertinente
+        """
+
+        if self._names is None:
+            self.build_name_index()
+
+        return self._names.search(query, limit)
+
+    def get_leaderboard(self, limit: int = 10, offset: int = 0) -> list[tuple[int, NSID, str, int, int]]:
+        """
+        Récupère le classement des membres par XP. Le tri et la pagination sont faits côté serveur, les ex aequo étant départagés par ID pour que les pages restent stables.
+
+        ## Paramètres
+        limit: `int`\n
+            Nombre de membres à renvoyer
+        offset: `int`\n
+            Nombre de membres à sauter (ex: `10` pour commencer au 11e)
+
+        ## Renvoie
+        - `list[tuple[int, NSID, str, int, int]]`: `(rang, ID, nom, XP, niveau)` de chaque membre
+        """
+
+        _res = self._select_many('individuals', 'id, name, xp', order = ('xp', 'id'), desc = True, limit = limit, offset = offset)
+        leaderboard = []
+
+        for i, _data in enumerate(_res):
+            rank = offset + i + 1
+
+            if leaderboard and leaderboard[-1][3] == _data['xp']: # Même XP, même rang
+                rank = leaderboard[-1][0]
+            elif offset and i == 0:
+                rank = self._count_in_db('individuals', xp__gt = _data['xp']) + 1
+
+            leaderboard.append((rank, NSID(_data['id']), _data['name'], _data['xp'], xp_to_level(_data['xp'])))
+
+        return leaderboard
+
+    def get_rank(self, id: NSID) -> tuple[int, int, int] | None:
+        """
+        Récupère le rang d'un membre dans le classement par XP, en comptant côté serveur les membres qui ont plus d'XP que lui.
+
+        ## Paramètres
+        id: `NSID`\n
+            ID du membre
+
+        ## Renvoie
+        - `tuple[int, int, int]`: Rang, XP et niveau du membre
+        - `None` si le membre n'existe pas
+        """
+
+        _res = self._select_many('individuals', 'xp', id = NSID(id))
+
+        if not _res:
+            return None
+
+        xp = _res[0]['xp']
+
+        return self._count_in_db('individuals', xp__gt = xp) + 1, xp, xp_to_level(xp)
+
     def get_entity_groups(self, id: NSID) -> list[Organization]:
         """
         Récupère les groupes auxquels appartient une entité.
@@ -248,6 +377,30 @@ class EntityInstance(Instance):
     ---- ARCHIVES --
     """
 
+    def schedule_sanctions(self, callback: typing.Callable[[Sanction], None]) -> "SanctionScheduler":
+        """
+        Appelle une fonction à l'expiration de chaque sanction temporaire.\n
+        Au premier appel, les sanctions temporaires sont parcourues une seule fois, page par page, et seules celles encore actives sont gardées. Les sanctions ajoutées ensuite via `_add_archive` sont prises en compte automatiquement.
+
+        ## Paramètres
+        callback: `Callable[[.Sanction], None]`\n
+            Fonction appelée avec chaque sanction qui expire
+
+        ## Renvoie
+        - `.SanctionScheduler`
+        """
+
+        if self._sanctions is None:
+            self._sanctions = SanctionScheduler()
+
+            for page in self._stream_from_db('archives', _type = 'sanction', **{ 'details->duration__gt': 0 }):
+                for _data in page:
+                    self._sanctions.add(self._archive_from_data(_data)) # Les sanctions expirées sont ignorées
+
+        self._sanctions.callbacks.append(callback)
+
+        return self._sanctions
+
     def _add_archive(self, archive: Archive):
         """
         Ajoute une archive d'une action (modification au sein d'un groupe ou sanction) dans la base de données.
@@ -272,6 +425,9 @@ class EntityInstance(Instance):
 
         self._put_in_db('archives', _data)
 
+        if self._sanctions is not None and type(archive) == Sanction:
+            self._sanctions.add(archive)
+
     def _get_archive(self, id: NSID) -> Archive | Sanction:
         """
         Récupère une archive spécifique.
@@ -290,6 +446,9 @@ class EntityInstance(Instance):
         if _data is None:
             return None
 
+        return self._archive_from_data(_data)
+
+    def _archive_from_data(self, _data: dict) -> Archive | Sanction:
         if _data['_type'] == "sanction": # Mute, ban, GAV, kick, détention, prune (xp seulement)
             archive = Sanction(_data['author'], _data['target'])
         elif _data['_type'] == "report": # Plainte
@@ -297,7 +456,7 @@ class EntityInstance(Instance):
         else:
             archive = Archive(_data['author'], _data['target'])
 
-        archive.id = id
+        archive.id = NSID(_data['id'])
         archive.date = _data['date']
         archive.action = _data['action']
         archive.details = _data['details']
@@ -319,3 +478,238 @@ class EntityInstance(Instance):
         _res = self.fetch('archives', **query)
 
         return [ self._get_archive(archive['id']) for archive in _res ]
+
+
+class XPBuffer:
+    """
+    Accumulateur d'XP qui regroupe les gains des membres en mémoire avant de les écrire.\n
+    Les gains sont envoyés en une seule requête atomique (fonction `add_xp_many(deltas)` côté serveur, qui incrémente la colonne `xp` de chaque membre, voir `instances/sql/entities.sql`) toutes les `interval` secondes, dès que `max_size` membres sont en attente, et une dernière fois à l'arrêt du programme.\n
+    L'XP local des `.User` n'est jamais modifié par le buffer (les gains en attente sont donnés par `pending`), sinon un `save_entity` écrirait des gains que le buffer ajouterait une seconde fois. `save_entity` écrit l'XP absolu: un membre dont l'XP passe par le buffer doit être relu (`get_entity`) avant d'être sauvegardé.
+
+    ## Attributs
+    - instance: `.EntityInstance`\n
+        Instance à utiliser
+    - interval: `float`\n
+        Délai (en secondes) entre deux écritures
+    - max_size: `int`\n
+        Nombre de membres en attente qui déclenche une écriture immédiate
+    """
+
+    def __init__(self, instance: EntityInstance, interval: float = 30, max_size: int = 500) -> None:
+        self.instance = instance
+        self.interval: float = interval
+        self.max_size: int = max_size
+
+        self._deltas: dict[NSID, int] = {}
+        self._multipliers: dict[NSID, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    def set_multiplier(self, id: NSID, multiplier: int) -> None:
+        """
+        Enregistre le multiplicateur d'XP d'un membre, appliqué aux gains ajoutés par ID.
+        """
+
+        self._multipliers[NSID(id)] = multiplier
+
+    def load_multipliers(self, ids: list[NSID]) -> None:
+        """
+        Calcule en une seule requête le multiplicateur d'XP de plusieurs membres à partir de leurs boosts (`individuals.boosts`). Les membres inexistants gardent un multiplicateur de `1`.
+        """
+
+        ids = NSID.many(ids)
+        multipliers = dict.fromkeys(ids, 1)
+
+        for _data in self.instance._select_many('individuals', 'id, boosts', id = ids):
+            user = User(_data['id'])
+            user.boosts = _data['boosts'] or {}
+
+            multipliers[user.id] = user.get_multiplier()
+
+        self._multipliers.update(multipliers)
+
+    def add(self, user: User | NSID, amount: int) -> int:
+        """
+        Ajoute un gain d'XP à un membre.
+
+        ## Paramètres
+        user: `.User | NSID`\n
+            Membre concerné. Avec un `.User`, son multiplicateur est mis à jour (son XP local n'est pas modifié). Avec un ID, le dernier multiplicateur connu est utilisé. Il est calculé à partir des boosts du membre (une requête) la première fois que l'ID est rencontré, voir `load_multipliers`.
+        amount: `int`\n
+            XP gagné, avant application des boosts
+
+        ## Renvoie
+        - `int`: XP réellement ajouté
+        """
+
+        if isinstance(user, User):
+            id = NSID(user.id)
+            self._multipliers[id] = user.get_multiplier()
+        else:
+            id = NSID(user)
+
+            if id not in self._multipliers:
+                self.load_multipliers([ id ])
+
+        delta = amount * self._multipliers[id]
+
+        with self._lock:
+            self._deltas[id] = self._deltas.get(id, 0) + delta
+            full = len(self._deltas) >= self.max_size
+
+        if full:
+            self.flush()
+
+        return delta
+
+    def pending(self, id: NSID) -> int:
+        """
+        Renvoie l'XP en attente d'écriture pour un membre.
+        """
+
+        with self._lock:
+            return self._deltas.get(NSID(id), 0)
+
+    def flush(self) -> int:
+        """
+        Écrit immédiatement tous les gains en attente.
+
+        ## Renvoie
+        - `int`: Nombre de membres mis à jour
+        """
+
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+
+        deltas = { id: xp for id, xp in deltas.items() if xp }
+
+        if not deltas:
+            return 0
+
+        try:
+            self.instance._call_rpc('add_xp_many', { 'deltas': [ { 'id': id, 'xp': xp } for id, xp in deltas.items() ] })
+        except Exception:
+            with self._lock: # Les gains non écrits seront renvoyés à la prochaine écriture
+                for id, xp in deltas.items():
+                    self._deltas[id] = self._deltas.get(id, 0) + xp
+
+            raise
+
+        return len(deltas)
+
+    def close(self) -> None:
+        """Arrête les écritures périodiques et écrit les gains restants."""
+
+        self._stopped.set()
+        self.flush()
+
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as err:
+                print("Erreur lors de l'écriture de l'XP:", err)
+
+
+class SanctionScheduler:
+    """
+    Planificateur qui garde les sanctions temporaires triées par date d'expiration (tas) et déclenche des fonctions quand elles expirent.
+
+    ## Attributs
+    - callbacks: `list[Callable[[.Sanction], None]]`\n
+        Fonctions appelées avec chaque sanction qui expire
+    """
+
+    def __init__(self) -> None:
+        self.callbacks: list[typing.Callable[[Sanction], None]] = []
+
+        self._heap: list[tuple[int, NSID, int, Sanction]] = [] # Le numéro d'ajout départage deux entrées identiques, les sanctions ne sont jamais comparées
+        self._sequence = itertools.count()
+        self._active: dict[NSID, int] = {} # Date d'expiration des sanctions prévues. Une entrée du tas qui ne correspond plus est ignorée.
+        self._condition = threading.Condition()
+
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def add(self, sanction: Sanction) -> None:
+        """
+        Ajoute une sanction. Les sanctions définitives (`duration = 0`), celles déjà expirées et celles déjà prévues sont ignorées.
+        """
+
+        duration = sanction.details.get('duration', 0)
+        expiry = sanction.date + duration
+
+        if not duration or expiry <= time.time():
+            return
+
+        with self._condition:
+            id = NSID(sanction.id)
+
+            if self._active.get(id) == expiry: # Déjà prévue (ex: reçue aussi par le flux de modifications)
+                return
+
+            self._active[id] = expiry
+
+            heapq.heappush(self._heap, (expiry, id, next(self._sequence), sanction))
+            self._condition.notify()
+
+    def cancel(self, id: NSID) -> None:
+        """
+        Retire une sanction levée avant son expiration.
+        """
+
+        with self._condition:
+            self._active.pop(NSID(id), None)
+
+    def next_expiry(self) -> int | None:
+        """
+        Renvoie la date (timestamp) de la prochaine expiration, ou `None` s'il n'y en a aucune.
+        """
+
+        with self._condition:
+            self._drop_stale()
+
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._active.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _pop_expired(self) -> list[Sanction]:
+        expired = []
+        self._drop_stale()
+
+        while self._heap and self._heap[0][0] <= time.time():
+            _, id, _, sanction = heapq.heappop(self._heap)
+            del self._active[id]
+
+            expired.append(sanction)
+            self._drop_stale()
+
+        return expired
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                expired = self._pop_expired()
+
+                if not expired:
+                    self._condition.wait(self._heap[0][0] - time.time() if self._heap else None)
+                    continue
+
+            for sanction in expired:
+                for callback in self.callbacks:
+                    try:
+                        callback(sanction)
+                    except Exception as err:
+                        print("Erreur lors de l'expiration d'une sanction:", err)
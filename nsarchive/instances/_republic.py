@@ -19,9 +19,27 @@ class RepublicInstance(Instance):
     - Occupants des différents rôles et historique de leurs actions: `.Official`
     """
 
+    _feed_tables = ('votes', 'lawsuits', 'voters')
+
     def __init__(self, id: str, token: str) -> None:
         super().__init__(create_client(f"https://{id}.supabase.co", token))
+
+        self._voters: dict[NSID, set[NSID]] = {} # Votants déjà confirmés, par vote
+        self._tallies: dict[NSID, tuple[float, Vote]] = {} # Résultats en cache et date de leur récupération
+        self.tally_ttl: int = 5 # Durée (en secondes) pendant laquelle un résultat en cache est considéré comme à jour
     
+    def _on_change(self, event: ChangeEvent) -> None:
+        if event.table == 'voters':
+            if event.type == 'INSERT':
+                self._voters.setdefault(NSID(event.record['vote_id']), set()).add(NSID(event.record['voter_id']))
+
+            return
+
+        super()._on_change(event)
+
+        if event.id is not None:
+            self._tallies.pop(NSID(event.id), None)
+
     """
     ---- VOTES & REFERENDUMS ----
     """
@@ -39,14 +57,11 @@ class RepublicInstance(Instance):
         """
 
         id = NSID(id)
-        _data = self._get_by_ID('votes', id)
-
-        if not _data: # Pas dans les votes -> peut-être dans les procès
-            _data = self._get_by_ID('lawsuits', id)
+        table, _data = self._locate_by_ID([ 'votes', 'lawsuits' ], id)
 
         if not _data: # Le vote n'existe juste pas
             return None
-        elif '_type' not in _data.keys(): # Le vote est un procès
+        elif table == 'lawsuits': # Le vote est un procès
             _data['_type'] = "lawsuit"
 
         if _data['_type'] == 'vote':
@@ -96,11 +111,151 @@ class RepublicInstance(Instance):
             'choices': [ opt.__dict__ for opt in vote.choices ]
         }
 
+        with self._lock:
+            self._changes += 1 # Un décompte lu avant cet enregistrement ne doit pas être remis en cache
+            self._tallies.pop(vote.id, None)
+
         if type(vote) == Lawsuit:
             del _data['_type']
             self._put_in_db('lawsuits', _data)
+            self._locations[vote.id] = 'lawsuits'
         else:
             self._put_in_db('votes', _data)
+            self._locations[vote.id] = 'votes'
+
+    def cast_vote(self, vote_id: NSID, option_id: str, voter_id: NSID) -> None:
+        """
+        Enregistre le choix d'un votant de manière atomique.\n
+        Le compteur de l'option est incrémenté côté serveur par la fonction `cast_vote(vote_id, option_id, voter_id)` (voir `instances/sql/republic.sql`), qui inscrit aussi le votant dans la table `voters` (clé unique sur `vote_id, voter_id`). Aucun vote n'est relu ni réécrit en entier, ce qui évite que deux votants simultanés s'écrasent.
+
+        ## Paramètres
+        vote_id: `NSID`\n
+            ID du vote ou du procès
+        option_id: `str`\n
+            ID de l'option choisie
+        voter_id: `NSID`\n
+            ID du votant
+
+        ## Erreurs
+        - `.AlreadyVotedError` si le votant a déjà participé à ce vote
+        - `.RessourceNotFoundError` si le vote ou l'option n'existe pas
+        """
+
+        from postgrest.exceptions import APIError
+
+        vote_id = NSID(vote_id)
+        voter_id = NSID(voter_id)
+
+        try:
+            _res = self._call_rpc('cast_vote', {
+                'vote_id': vote_id,
+                'option_id': option_id,
+                'voter_id': voter_id
+            })
+        except APIError as err:
+            if err.code != '23505': # Seule la violation de la clé unique de `voters` correspond à un double vote
+                raise
+
+            _res = 'already_voted'
+
+        if _res == 'not_found':
+            raise RessourceNotFoundError(f"Option <{option_id}> not found in vote <{vote_id}>.")
+        elif _res not in ('ok', 'already_voted'):
+            raise RuntimeError(f"Unexpected result from cast_vote: {_res!r} (see instances/sql/republic.sql)")
+
+        with self._lock:
+            self._voters.setdefault(vote_id, set()).add(voter_id)
+
+            if _res == 'already_voted':
+                raise AlreadyVotedError(f"<{voter_id}> has already voted in <{vote_id}>.")
+
+            entry = self._tallies.get(vote_id)
+
+            if entry is not None: # Le décompte en cache suit les votes enregistrés par cette instance
+                option = entry[1].by_id(option_id)
+
+                if option is not None:
+                    option.count += 1
+
+    def get_results(self, id: NSID) -> Vote | Referendum | Lawsuit:
+        """
+        Récupère les résultats d'un vote depuis le cache local.\n
+        Le vote n'est récupéré depuis la base que si le cache a plus de `tally_ttl` secondes. Les votes enregistrés via `cast_vote` sont ajoutés au décompte au fur et à mesure, et `save_vote` invalide le cache.
+
+        ## Paramètres
+        id: `NSID`\n
+            ID du vote.
+
+        ## Renvoie
+        - `.Vote | .Referendum | .Lawsuit`, dont les méthodes `sorted`, `percentages` et `leader` donnent le classement
+        - `None` si le vote n'existe pas
+        """
+
+        id = NSID(id)
+
+        with self._lock:
+            entry = self._tallies.get(id)
+            changes = self._changes
+
+        if entry is not None and time.time() - entry[0] < self.tally_ttl:
+            return entry[1]
+
+        vote = self.get_vote(id)
+
+        with self._lock:
+            if vote is not None and self._changes == changes: # Sinon le vote a pu changer pendant la requête
+                self._tallies[id] = (time.time(), vote)
+
+        return vote
+
+    def has_voted(self, vote_id: NSID, voter_id: NSID) -> bool:
+        """
+        Vérifie si une entité a déjà participé à un vote.
+
+        ## Paramètres
+        vote_id: `NSID`\n
+            ID du vote
+        voter_id: `NSID`\n
+            ID de l'entité
+
+        ## Renvoie
+        - `bool`
+        """
+
+        voter_id = NSID(voter_id)
+
+        return self.get_voters_status(vote_id, [ voter_id ])[voter_id]
+
+    def get_voters_status(self, vote_id: NSID, voter_ids: list[NSID]) -> dict[NSID, bool]:
+        """
+        Vérifie en une seule requête la participation de plusieurs entités à un vote.\n
+        Seule la table `voters` (indexée sur `vote_id, voter_id`) est consultée, l'historique de vote des entités n'est pas chargé.
+
+        ## Paramètres
+        vote_id: `NSID`\n
+            ID du vote
+        voter_ids: `list[NSID]`\n
+            IDs des entités à vérifier
+
+        ## Renvoie
+        - `dict[NSID, bool]` indexé par ID d'entité
+        """
+
+        vote_id = NSID(vote_id)
+        voter_ids = NSID.many(voter_ids)
+
+        with self._lock:
+            known = self._voters.setdefault(vote_id, set())
+            unknown = [ id for id in voter_ids if id not in known ]
+
+        if unknown: # Une participation ne peut pas être annulée, seuls les votants inconnus sont vérifiés
+            _res = self._select_many('voters', 'voter_id', vote_id = vote_id, voter_id = unknown)
+
+            with self._lock:
+                known.update(NSID(row['voter_id']) for row in _res)
+
+        with self._lock:
+            return { id: id in known for id in voter_ids }
 
     # Aucune possibilité de supprimer un vote
 
@@ -124,29 +279,48 @@ class RepublicInstance(Instance):
 
         id = NSID(id)
 
-        base = 'mandate' if current_mandate else 'archives'
+        return self.get_officials([ id ], current_mandate)[id]
+
+    def get_officials(self, ids: list[NSID], current_mandate: bool = True) -> dict[NSID, Official]:
+        """
+        Récupère les informations de plusieurs fonctionnaires en une seule requête.\n
+        Les compteurs sont agrégés côté serveur par la fonction `count_official_actions(base, ids)` (voir `instances/sql/republic.sql`), qui renvoie une ligne `{ official, kind, key, total }` par poste (`kind = 'mandate'`, élections et promotions) et par action (`kind = 'contrib'`).
+
+        ## Paramètres
+        ids: `list[NSID]`\n
+            IDs des fonctionnaires.
+        current_mandate: `bool`\n
+            Indique si l'on doit récupérer le mandat actuel ou les anciens mandats.
 
-        _contributions = self.fetch(base, author = id, _type = 'contrib')
-        _mandates = self.fetch(base, target = id, _type = 'election') +\
-                    self.fetch(base, target = id, _type = 'promotion')
+        ## Renvoie
+        - `dict[NSID, .Official]` indexé par ID
+        """
 
-        user = Official(id)
-        for mandate in _mandates:
-            if mandate['details']['position'].startswith('MIN'):
-                mandate['details']['position'] = 'MIN'
+        ids = list(dict.fromkeys(NSID(id) for id in ids))
+        officials = { id: Official(id) for id in ids }
 
-            try:
-                user.mandates[mandate['details']['position']] += 1
-            except KeyError:
-                user.mandates[mandate['details']['position']] = 1
+        if not ids:
+            return officials
 
-        for contrib in _contributions:
-            try:
-                user.contributions[contrib['action']] += 1
-            except KeyError:
-                user.contributions[contrib['action']] = 1
+        _counters = self._call_rpc('count_official_actions', {
+            'base': 'mandate' if current_mandate else 'archives',
+            'ids': ids
+        })
 
-        return user
+        for counter in _counters or []:
+            user = officials[NSID(counter['official'])]
+
+            if counter['kind'] == 'mandate':
+                position = counter['key']
+
+                if position.startswith('MIN'):
+                    position = 'MIN'
+
+                user.mandates[position] = user.mandates.get(position, 0) + counter['total']
+            elif counter['kind'] == 'contrib':
+                user.contributions[counter['key']] = user.contributions.get(counter['key'], 0) + counter['total']
+
+        return officials
 
     def get_institutions(self) -> State:
         """Récupère l'état actuel des institutions de la république."""
@@ -157,14 +331,18 @@ class RepublicInstance(Instance):
         court = Court()
         police_forces = PoliceForces()
 
-        _get_position: list[dict] = lambda pos : self._select_from_db('functions', 'id', pos)[0]['users']
+        _functions: dict[str, list] = { row['id']: row['users'] for row in self._select_from_db('functions') or [] }
+        _get_position = lambda pos : _functions[pos]
+
+        officials = self.get_officials([ 0xF7DB60DD1C4300A, 0x0 ] + [ user for users in _functions.values() for user in users ])
+        official = lambda id : officials[NSID(id)]
 
-        admin.members = [ self.get_official(user) for user in _get_position('ADMIN') ]
-        admin.president = self.get_official(0xF7DB60DD1C4300A) # happex (remplace Kheops pour l'instant)
+        admin.members = [ official(user) for user in _get_position('ADMIN') ]
+        admin.president = official(0xF7DB60DD1C4300A) # happex (remplace Kheops pour l'instant)
 
-        gov.president = self.get_official(0x0)
+        gov.president = official(0x0)
 
-        minister = lambda code : self.get_official(_get_position(f'MIN_{code}')[0])
+        minister = lambda code : official(_get_position(f'MIN_{code}')[0])
         gov.prime_minister = minister('PRIM')
         gov.economy_minister = minister('ECO')
         gov.inner_minister = minister('INN')
@@ -172,14 +350,14 @@ class RepublicInstance(Instance):
         gov.justice_minister = minister('JUS')
         gov.outer_minister = minister('OUT')
 
-        assembly.president = self.get_official(_get_position('PRE_AS')[0])
-        assembly.members = [ self.get_official(user) for user in _get_position('REPR') ]
+        assembly.president = official(_get_position('PRE_AS')[0])
+        assembly.members = [ official(user) for user in _get_position('REPR') ]
 
         court.president = gov.justice_minister
-        court.members = [ self.get_official(user) for user in _get_position('JUDGE') ]
+        court.members = [ official(user) for user in _get_position('JUDGE') ]
 
         police_forces.president = gov.inner_minister
-        police_forces.members = [ self.get_official(user) for user in _get_position('POLICE') ]
+        police_forces.members = [ official(user) for user in _get_position('POLICE') ]
 
         instits = State()
         instits.administration = admin
@@ -200,22 +378,31 @@ class RepublicInstance(Instance):
             Le nouvel état des institutions, à sauvegarder.
         """
 
-        get_ids = lambda institution : [ member.id for member in institutions.__getattribute__(institution).members ]
+        get_ids = lambda institution : [ NSID(member.id) for member in institutions.__getattribute__(institution).members ]
+
+        _functions = {
+            'ADMIN': get_ids('administration'),
+            'REPR': get_ids('assembly'),
+            'JUDGE': get_ids('court'),
+            'POLICE': get_ids('police'),
+
+            'PRE_AS': [ NSID(institutions.assembly.president.id) ],
+            'PRE_REP': [ NSID(institutions.government.president.id) ],
+
+            'MIN_PRIM': [ NSID(institutions.government.prime_minister.id) ],
+            'MIN_INN': [ NSID(institutions.government.inner_minister.id) ],
+            'MIN_JUS': [ NSID(institutions.government.justice_minister.id) ],
+            'MIN_ECO': [ NSID(institutions.government.economy_minister.id) ],
+            'MIN_AUD': [ NSID(institutions.government.press_minister.id) ],
+            'MIN_OUT': [ NSID(institutions.government.outer_minister.id) ]
+        }
 
-        self._put_in_db('functions', { 'id': 'ADMIN', 'users': get_ids('administration') })
-        self._put_in_db('functions', { 'id': 'REPR', 'users': get_ids('assembly') })
-        self._put_in_db('functions', { 'id': 'JUDGE', 'users': get_ids('court') })
-        self._put_in_db('functions', { 'id': 'POLICE', 'users': get_ids('police') })
+        _current = { row['id']: NSID.many(row['users']) for row in self._select_from_db('functions') or [] }
 
-        self._put_in_db('functions', { 'id': 'PRE_AS', 'users': [ institutions.assembly.president.id ] })
-        self._put_in_db('functions', { 'id': 'PRE_REP', 'users': [ institutions.government.president.id ] })
+        _data = [ { 'id': id, 'users': users } for id, users in _functions.items() if _current.get(id) != users ]
 
-        self._put_in_db('functions', { 'id': 'MIN_PRIM', 'users': [ institutions.government.prime_minister.id ] })
-        self._put_in_db('functions', { 'id': 'MIN_INN', 'users': [ institutions.government.inner_minister.id ] })
-        self._put_in_db('functions', { 'id': 'MIN_JUS', 'users': [ institutions.government.justice_minister.id ] })
-        self._put_in_db('functions', { 'id': 'MIN_ECO', 'users': [ institutions.government.economy_minister.id ] })
-        self._put_in_db('functions', { 'id': 'MIN_AUD', 'users': [ institutions.government.press_minister.id ] })
-        self._put_in_db('functions', { 'id': 'MIN_OUT', 'users': [ institutions.government.outer_minister.id ] })
+        if _data: # Toutes les fonctions modifiées sont écrites en une seule requête
+            self._put_in_db('functions', _data)
 
     def new_mandate(self, institutions: State, weeks: int = 4):
         """
@@ -0,0 +1,412 @@
+-- Fonctions côté serveur utilisées par `EconomyInstance`.
+-- À exécuter dans l'éditeur SQL du projet Supabase (les fonctions sont appelées via RPC).
+-- Les IDs (NSID) sont stockés en `text`, les dates en timestamp (secondes), les sommes en entiers.
+--
+-- Format des fonctions qui déplacent de l'argent (transfer_many, buy_sale, buy_cheapest):
+-- elles renvoient toujours un objet `jsonb`.
+--   En cas d'échec, rien n'est modifié et l'objet contient `error` et l'ID concerné:
+--     { "error": "not_found", "account": id }  compte inexistant
+--     { "error": "frozen", "account": id }     compte gelé
+--     { "error": "funds", "account": id }      solde insuffisant
+--     { "error": "sale", "sale": id }          vente inexistante, épuisée ou mise en vente par l'acheteur
+--   En cas de succès, l'objet ne contient pas `error` (voir chaque fonction pour son contenu).
+--
+-- Verrous: toutes les fonctions qui modifient des soldes (transfer_many, apply_rate, buy_sale, buy_cheapest) verrouillent d'abord
+-- tous leurs comptes en une seule requête, par ID croissant, puis les ventes, par ID croissant. Deux appels simultanés attendent
+-- donc l'un après l'autre au lieu de s'interbloquer.
+
+
+-- transfer_many(transfers)
+-- Utilisée par `EconomyInstance.transfer` et `transfer_many`.
+--
+-- `transfers` est une liste d'archives `Transaction` (id, date, author, target, action, details, _type).
+-- Pour chacune, débite `author`, crédite `target` (solde et revenus) et enregistre l'archive. Tout ou rien.
+-- Renvoie {} en cas de succès.
+
+create or replace function transfer_many(transfers jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    _transfer jsonb;
+    _amount bigint;
+    _error text;
+    _account text;
+begin
+    -- Les comptes sont verrouillés dans un ordre fixe pour éviter les interblocages entre deux appels simultanés
+    perform 1 from accounts
+    where id in (select t->>'author' from jsonb_array_elements(transfers) t union select t->>'target' from jsonb_array_elements(transfers) t)
+    order by id
+    for update;
+
+    begin
+        for _transfer in select * from jsonb_array_elements(transfers) loop
+            _amount := (_transfer->'details'->>'amount')::bigint;
+
+            update accounts set amount = amount - _amount
+            where id = _transfer->>'author' and not frozen and amount >= _amount;
+
+            if not found then
+                _account := _transfer->>'author';
+                select case when frozen then 'frozen' else 'funds' end into _error from accounts where id = _account;
+                _error := coalesce(_error, 'not_found');
+
+                raise exception 'transfer failed';
+            end if;
+
+            update accounts set amount = amount + _amount, income = income + _amount
+            where id = _transfer->>'target' and not frozen;
+
+            if not found then
+                _account := _transfer->>'target';
+                select case when frozen then 'frozen' end into _error from accounts where id = _account;
+                _error := coalesce(_error, 'not_found');
+
+                raise exception 'transfer failed';
+            end if;
+
+            insert into archives select * from jsonb_populate_record(null::archives, _transfer);
+        end loop;
+    exception when raise_exception then
+        if _error is null then
+            raise;
+        end if;
+
+        -- Les transferts déjà appliqués par ce bloc sont annulés
+        return jsonb_build_object('error', _error, 'account', _account);
+    end;
+
+    return '{}'::jsonb;
+end;
+$$;
+
+
+-- apply_rate(rate, filters)
+-- Utilisée par `EconomyInstance.apply_rate`.
+--
+-- Ajoute `trunc(amount * rate / 100)` au solde des comptes non gelés qui correspondent à `filters`. L'arrondi se fait vers zéro: une taxe ne dépasse jamais son taux.
+-- `filters` associe une colonne de `accounts` à une valeur ou à une liste de valeurs (`{}` pour tous les comptes). Chaque filtre devient `colonne = any(valeurs)` dans le type de la colonne, ce qui permet d'utiliser ses index.
+-- Chaque modification est enregistrée comme une archive `Transaction` (action `interest` ou `tax`) entre le compte et sa banque, pour que le rapprochement des soldes (`nsarchive.ledger`) reste juste.
+-- Les IDs des archives sont construits à partir de la date en millisecondes (jusqu'à 16^5 comptes par appel).
+-- Renvoie le nombre de comptes modifiés.
+
+create or replace function apply_rate(rate numeric, filters jsonb default '{}')
+returns integer
+language plpgsql
+as $$
+declare
+    _count integer;
+    _date bigint := extract(epoch from now())::bigint;
+    _base bigint := (extract(epoch from clock_timestamp()) * 1000)::bigint * 1048576;
+    _where text := 'not frozen';
+    _column text;
+    _values jsonb;
+    _type text;
+begin
+    for _column, _values in select key, value from jsonb_each(coalesce(filters, '{}')) loop
+        select format_type(atttypid, atttypmod) into _type
+        from pg_attribute
+        where attrelid = 'accounts'::regclass and attname = _column and attnum > 0 and not attisdropped;
+
+        if _type is null then
+            raise exception 'unknown column: %', _column;
+        end if;
+
+        if jsonb_typeof(_values) <> 'array' then
+            _values := jsonb_build_array(_values);
+        end if;
+
+        _where := _where || format(' and %I = any(%L::%s[])', _column, array(select jsonb_array_elements_text(_values)), _type);
+    end loop;
+
+    execute format($query$
+        with deltas as (
+            select id, bank, trunc(amount * $1 / 100)::bigint as delta
+            from accounts
+            where %s
+            order by id
+            for update
+        ), changed as (
+            update accounts a set amount = a.amount + d.delta
+            from deltas d
+            where a.id = d.id and d.delta <> 0
+            returning a.id, a.bank, d.delta
+        )
+        insert into archives (id, date, author, target, action, details, _type)
+        select
+            upper(to_hex($2 + row_number() over (order by id))),
+            $3,
+            case when delta > 0 then bank else id end,
+            case when delta > 0 then id else bank end,
+            case when delta > 0 then 'interest' else 'tax' end,
+            jsonb_build_object('amount', abs(delta), 'currency', 'HC', 'reason', format('rate %%s%%%%', $1)),
+            'transaction'
+        from changed
+    $query$, _where) using rate, _base, _date;
+
+    get diagnostics _count = row_count;
+
+    return _count;
+end;
+$$;
+
+
+-- best_asks(items)
+-- Utilisée par `EconomyInstance.get_best_ask` et `get_best_asks`.
+--
+-- Renvoie, pour chaque item de `items`, sa vente non épuisée la moins chère (à prix égal, la plus ancienne). Les items sans vente n'ont pas de ligne.
+-- Un index sur `market (item, price, id)` permet de ne lire qu'une ligne par item.
+
+create or replace function best_asks(items text[])
+returns setof market
+language sql stable
+as $$
+    select distinct on (item) *
+    from market
+    where item = any(items) and quantity > 0
+    order by item, price, id;
+$$;
+
+
+-- Comptes utilisés pour les achats
+-- Les ventes et les inventaires sont liés aux entités, pas aux comptes: l'acheteur et le vendeur paient et sont payés avec leur compte principal, c'est-à-dire leur compte de plus petit ID.
+-- Chaque achat est archivé comme une `Transaction` (action `buy`) dont l'ID est construit à partir de la date en microsecondes.
+
+
+-- buy_sale(sale, buyer, quantity, partial)
+-- Utilisée par `EconomyInstance.buy`.
+--
+-- Achète `quantity` objets de la vente `sale` (moins si `partial` et que la vente n'en a plus assez).
+-- Débite l'acheteur, crédite le vendeur (solde et revenus), archive la transaction, ajoute les objets à l'inventaire de l'acheteur et réduit ou supprime la vente.
+-- Un vendeur ne peut pas acheter sa propre vente (erreur `sale`), comme pour `buy_cheapest`.
+-- Renvoie { "item": id, "quantity": objets achetés, "cost": prix total } en cas de succès, ou une erreur (voir le format en haut du fichier).
+
+create or replace function buy_sale(sale text, buyer text, quantity integer, partial boolean default false)
+returns jsonb
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    _sale market;
+    _quantity integer;
+    _cost bigint;
+    _buyer accounts;
+    _seller accounts;
+begin
+    select * into _sale from market where id = buy_sale.sale and quantity > 0;
+
+    if not found or _sale.seller_id = buy_sale.buyer then
+        return jsonb_build_object('error', 'sale', 'sale', buy_sale.sale);
+    end if;
+
+    select * into _buyer from accounts where owner_id = buy_sale.buyer order by length(id), id limit 1;
+
+    if not found then
+        return jsonb_build_object('error', 'not_found', 'account', buy_sale.buyer);
+    end if;
+
+    select * into _seller from accounts where owner_id = _sale.seller_id order by length(id), id limit 1;
+
+    if not found then
+        return jsonb_build_object('error', 'not_found', 'account', _sale.seller_id);
+    end if;
+
+    -- Comptes puis vente (voir l'ordre des verrous en haut du fichier), relus une fois verrouillés
+    perform 1 from accounts where id in (_buyer.id, _seller.id) order by id for update;
+    select * into _buyer from accounts where id = _buyer.id;
+    select * into _seller from accounts where id = _seller.id;
+
+    select * into _sale from market where id = _sale.id and quantity > 0 for update;
+
+    if not found then -- Vendue entre-temps
+        return jsonb_build_object('error', 'sale', 'sale', buy_sale.sale);
+    end if;
+
+    _quantity := least(buy_sale.quantity, _sale.quantity);
+
+    if _quantity < buy_sale.quantity and not buy_sale.partial then
+        return jsonb_build_object('error', 'sale', 'sale', buy_sale.sale);
+    end if;
+
+    _cost := _quantity::bigint * _sale.price;
+
+    if _buyer.frozen then
+        return jsonb_build_object('error', 'frozen', 'account', _buyer.id);
+    elsif _seller.frozen then
+        return jsonb_build_object('error', 'frozen', 'account', _seller.id);
+    elsif _buyer.amount < _cost then
+        return jsonb_build_object('error', 'funds', 'account', _buyer.id);
+    end if;
+
+    update accounts set amount = amount - _cost where id = _buyer.id;
+    update accounts set amount = amount + _cost, income = income + _cost where id = _seller.id;
+
+    insert into archives (id, date, author, target, action, details, _type) values (
+        upper(to_hex((extract(epoch from clock_timestamp()) * 1000000)::bigint * 256)),
+        extract(epoch from now())::bigint,
+        _buyer.id,
+        _seller.id,
+        'buy',
+        jsonb_build_object('amount', _cost, 'currency', 'HC', 'reason', null, 'sale', _sale.id, 'item', _sale.item, 'quantity', _quantity),
+        'transaction'
+    );
+
+    insert into inventories (id, owner_id, objects) values (buy_sale.buyer, buy_sale.buyer, jsonb_build_object(_sale.item, _quantity))
+    on conflict (id) do update set objects = inventories.objects || jsonb_build_object(_sale.item, coalesce((inventories.objects->>_sale.item)::integer, 0) + _quantity);
+
+    if _quantity = _sale.quantity then
+        delete from market where id = _sale.id;
+    else
+        update market set quantity = quantity - _quantity where id = _sale.id;
+    end if;
+
+    return jsonb_build_object('item', _sale.item, 'quantity', _quantity, 'cost', _cost);
+end;
+$$;
+
+
+-- buy_cheapest(item, buyer, quantity, max_price)
+-- Utilisée par `EconomyInstance.buy_cheapest`.
+--
+-- Parcourt les ventes de `item` de la moins chère à la plus chère (à prix égal, la plus ancienne) et achète jusqu'à `quantity` objets.
+-- S'arrête quand la quantité est atteinte, quand il n'y a plus de vente sous `max_price` (`null` = pas de limite) ou quand l'acheteur ne peut plus payer l'objet suivant.
+-- Les ventes de l'acheteur et celles dont le vendeur n'a pas de compte ou a un compte gelé sont ignorées. Une archive `Transaction` est enregistrée par vente utilisée.
+-- Les ventes retenues (les moins chères, jusqu'à couvrir `quantity`) et les comptes de leurs vendeurs sont verrouillés avant l'achat: une vente achetée entre-temps par un autre appel peut réduire la quantité obtenue.
+-- Renvoie { "item": id, "quantity": objets achetés, "cost": prix total } (quantité éventuellement nulle), ou une erreur si le compte de l'acheteur n'existe pas ou est gelé.
+
+create or replace function buy_cheapest(item text, buyer text, quantity integer, max_price bigint default null)
+returns jsonb
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    _sale market;
+    _buyer accounts;
+    _seller accounts;
+    _sales text[];
+    _locked text[];
+    _left integer := buy_cheapest.quantity;
+    _quantity integer;
+    _total integer := 0;
+    _cost bigint := 0;
+    _base bigint := (extract(epoch from clock_timestamp()) * 1000000)::bigint * 256;
+    _count integer := 0;
+begin
+    select * into _buyer from accounts where owner_id = buy_cheapest.buyer order by length(id), id limit 1;
+
+    if not found then
+        return jsonb_build_object('error', 'not_found', 'account', buy_cheapest.buyer);
+    end if;
+
+    -- Ventes retenues: les moins chères, jusqu'à couvrir la quantité demandée
+    select array_agg(id) into _sales
+    from (
+        select id, sum(quantity) over (order by price, id) - quantity as before
+        from market
+        where item = buy_cheapest.item and quantity > 0 and seller_id <> buy_cheapest.buyer and (buy_cheapest.max_price is null or price <= buy_cheapest.max_price)
+    ) candidates
+    where before < buy_cheapest.quantity;
+
+    -- Compte de l'acheteur et comptes principaux des vendeurs, puis ventes (voir l'ordre des verrous en haut du fichier)
+    select array_agg(id) into _locked
+    from (
+        select id from accounts
+        where id = _buyer.id or id in (
+            select distinct on (owner_id) id from accounts
+            where owner_id in (select seller_id from market where id = any(_sales))
+            order by owner_id, length(id), id
+        )
+        order by id
+        for update
+    ) locked;
+
+    select * into _buyer from accounts where id = _buyer.id;
+
+    if _buyer.frozen then
+        return jsonb_build_object('error', 'frozen', 'account', _buyer.id);
+    end if;
+
+    perform 1 from market where id = any(_sales) order by id for update;
+
+    for _sale in
+        select * from market
+        where id = any(_sales) and quantity > 0
+        order by price, id
+    loop
+        exit when _left = 0;
+
+        _quantity := least(_left, _sale.quantity, case when _sale.price > 0 then (_buyer.amount - _cost) / _sale.price else _left end);
+        exit when _quantity <= 0; -- Les ventes suivantes sont au moins aussi chères
+
+        select * into _seller from accounts where owner_id = _sale.seller_id order by length(id), id limit 1;
+        continue when not found or _seller.frozen or not _seller.id = any(_locked);
+
+        update accounts set amount = amount + _quantity::bigint * _sale.price, income = income + _quantity::bigint * _sale.price where id = _seller.id;
+
+        insert into archives (id, date, author, target, action, details, _type) values (
+            upper(to_hex(_base + _count)),
+            extract(epoch from now())::bigint,
+            _buyer.id,
+            _seller.id,
+            'buy',
+            jsonb_build_object('amount', _quantity::bigint * _sale.price, 'currency', 'HC', 'reason', null, 'sale', _sale.id, 'item', _sale.item, 'quantity', _quantity),
+            'transaction'
+        );
+
+        if _quantity = _sale.quantity then
+            delete from market where id = _sale.id;
+        else
+            update market set quantity = quantity - _quantity where id = _sale.id;
+        end if;
+
+        _cost := _cost + _quantity::bigint * _sale.price;
+        _total := _total + _quantity;
+        _left := _left - _quantity;
+        _count := _count + 1;
+    end loop;
+
+    if _total > 0 then
+        update accounts set amount = amount - _cost where id = _buyer.id;
+
+        insert into inventories (id, owner_id, objects) values (buy_cheapest.buyer, buy_cheapest.buyer, jsonb_build_object(buy_cheapest.item, _total))
+        on conflict (id) do update set objects = inventories.objects || jsonb_build_object(buy_cheapest.item, coalesce((inventories.objects->>buy_cheapest.item)::integer, 0) + _total);
+    end if;
+
+    return jsonb_build_object('item', buy_cheapest.item, 'quantity', _total, 'cost', _cost);
+end;
+$$;
+
+
+-- wealth_by_owner(owners, n)
+-- Utilisée par `EconomyInstance.get_wealth` (avec `owners`) et `get_richest` (avec `n`).
+--
+-- Renvoie une ligne { owner_id, total } par titulaire: la somme de tous ses comptes, gelés compris.
+-- `owners` limite le calcul à ces titulaires (`null` = tous), `n` limite le nombre de lignes (`null` = toutes), de la plus grosse fortune à la plus petite.
+
+create or replace function wealth_by_owner(owners text[] default null, n integer default null)
+returns table (owner_id text, total bigint)
+language sql stable
+as $$
+    select a.owner_id, sum(a.amount)::bigint
+    from accounts a
+    where owners is null or a.owner_id = any(owners)
+    group by a.owner_id
+    order by 2 desc, 1
+    limit n;
+$$;
+
+
+-- wealth_by_bank()
+-- Utilisée par `EconomyInstance.get_bank_totals`.
+--
+-- Renvoie une ligne { bank, total } par banque: la somme des comptes qu'elle gère.
+
+create or replace function wealth_by_bank()
+returns table (bank text, total bigint)
+language sql stable
+as $$
+    select a.bank, sum(a.amount)::bigint
+    from accounts a
+    group by a.bank
+    order by 2 desc;
+$$;
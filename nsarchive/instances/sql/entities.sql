@@ -0,0 +1,24 @@
+-- Fonctions côté serveur utilisées par `EntityInstance` et `XPBuffer`.
+-- À exécuter dans l'éditeur SQL du projet Supabase (les fonctions sont appelées via RPC).
+-- Les IDs (NSID) sont stockés en `text`.
+
+
+-- add_xp_many(deltas)
+-- Utilisée par `XPBuffer.flush`.
+--
+-- `deltas` est une liste de { "id": membre, "xp": gain } (un seul élément par membre).
+-- Ajoute chaque gain à la colonne `xp` du membre, dans une seule requête. Les membres inexistants sont ignorés.
+-- Renvoie le nombre de membres modifiés.
+
+create or replace function add_xp_many(deltas jsonb)
+returns integer
+language sql
+as $$
+    with updated as (
+        update individuals i set xp = i.xp + (d->>'xp')::bigint
+        from jsonb_array_elements(deltas) d
+        where i.id = d->>'id'
+        returning 1
+    )
+    select count(*)::integer from updated;
+$$;
@@ -0,0 +1,98 @@
+-- Fonctions et tables côté serveur utilisées par `RepublicInstance`.
+-- À exécuter dans l'éditeur SQL du projet Supabase (les fonctions sont appelées via RPC).
+-- Les IDs (NSID) sont stockés en `text`, les dates en timestamp (secondes).
+
+
+-- count_official_actions(base, ids)
+-- Utilisée par `RepublicInstance.get_officials` (et donc `get_official` et `get_institutions`).
+--
+-- Compte, pour chaque fonctionnaire de `ids`, ses postes et ses contributions dans la table `base` (`mandate` ou `archives`).
+-- Renvoie une ligne par compteur:
+--   { official, kind = 'mandate', key = poste (details->>'position'), total } pour les élections et promotions
+--   { official, kind = 'contrib', key = action, total } pour les contributions
+
+create or replace function count_official_actions(base text, ids text[])
+returns table (official text, kind text, key text, total bigint)
+language plpgsql stable
+as $$
+begin
+    if base not in ('mandate', 'archives') then
+        raise exception 'invalid base: %', base;
+    end if;
+
+    return query execute format($query$
+        select target, 'mandate', details->>'position', count(*)
+        from %1$I
+        where target = any($1) and _type in ('election', 'promotion')
+        group by target, details->>'position'
+
+        union all
+
+        select author, 'contrib', action, count(*)
+        from %1$I
+        where author = any($1) and _type = 'contrib'
+        group by author, action
+    $query$, base) using ids;
+end;
+$$;
+
+
+-- Table voters
+-- Participation des entités aux votes et procès, utilisée par `RepublicInstance.cast_vote` et `get_voters_status`.
+-- La clé primaire empêche un même votant de participer deux fois.
+
+create table if not exists voters (
+    vote_id text not null,
+    voter_id text not null,
+    date bigint not null default extract(epoch from now())::bigint,
+    primary key (vote_id, voter_id)
+);
+
+
+-- cast_vote(vote_id, option_id, voter_id)
+-- Utilisée par `RepublicInstance.cast_vote`.
+--
+-- Inscrit le votant dans `voters` et incrémente le compteur de l'option choisie (dans `votes` ou `lawsuits`), dans une seule transaction.
+-- Renvoie un texte:
+--   'ok'             le vote est enregistré
+--   'already_voted'  le votant a déjà participé à ce vote (rien n'est modifié)
+--   'not_found'      le vote ou l'option n'existe pas (rien n'est modifié)
+
+create or replace function cast_vote(vote_id text, option_id text, voter_id text)
+returns text
+language plpgsql
+as $$
+declare
+    _table text;
+    _index int;
+begin
+    foreach _table in array array['votes', 'lawsuits'] loop
+        execute format($query$
+            select (o.position - 1)::int
+            from %I v, jsonb_array_elements(v.choices) with ordinality as o(option, position)
+            where v.id = $1 and o.option->>'id' = $2
+        $query$, _table) into _index using cast_vote.vote_id, cast_vote.option_id;
+
+        exit when _index is not null;
+    end loop;
+
+    if _index is null then
+        return 'not_found';
+    end if;
+
+    insert into voters (vote_id, voter_id) values (cast_vote.vote_id, cast_vote.voter_id)
+    on conflict do nothing;
+
+    if not found then
+        return 'already_voted';
+    end if;
+
+    -- Le compteur est relu dans l'update lui-même: deux votes simultanés ne s'écrasent pas
+    execute format($query$
+        update %I set choices = jsonb_set(choices, array[$2::text, 'count'], to_jsonb((choices->$2->>'count')::int + 1))
+        where id = $1
+    $query$, _table) using cast_vote.vote_id, _index;
+
+    return 'ok';
+end;
+$$;
@@ -0,0 +1,175 @@
+"""
+Rapprochement entre le solde des comptes bancaires et les archives de transactions.
+
+Le `Reconciler` rejoue les transactions dans l'ordre chronologique et garde un solde attendu pour chaque compte. Ces soldes sont enregistrés dans un point de contrôle (fichier JSON), ce qui permet aux exécutions suivantes de ne traiter que les nouvelles archives.
+
+La date d'une archive est fixée avant son enregistrement, et les IDs d'une même seconde ne sont pas rangés dans l'ordre d'enregistrement. Chaque exécution relit donc les `margin` dernières secondes déjà traitées, et les archives déjà comptées (gardées par ID dans le point de contrôle) sont ignorées.
+
+Les soldes qui ne viennent pas de transactions archivées (soldes d'ouverture, création monétaire, modifications faites à la main...) sont pris en compte en partant d'une photographie des comptes (`Reconciler.baseline`) plutôt que d'un solde nul.
+"""
+
+import json
+import os
+
+from .cls.base import NSID, Instance
+
+class Reconciler:
+    """
+    Vérifie que le solde (`amount`) de chaque compte correspond à la somme de ses transactions.
+
+    ## Attributs
+    - instance: `.EconomyInstance`\n
+        Instance à utiliser
+    - path: `str`\n
+        Chemin du fichier de point de contrôle
+    - balances: `dict[NSID, int]`\n
+        Solde attendu de chaque compte, d'après les transactions déjà traitées
+    - last: `tuple[int, NSID] | None`\n
+        Date et ID de la transaction traitée la plus récente
+    - margin: `int`\n
+        Durée (en secondes) relue à chaque exécution. Doit dépasser le plus long délai entre la date d'une archive et son enregistrement.
+    - recent: `dict[NSID, int]`\n
+        Date des transactions déjà traitées dans cette période, par ID
+    """
+
+    def __init__(self, instance: Instance, path: str = "ledger.json", page_size: int = 1000, margin: int = 300) -> None:
+        self.instance = instance
+        self.path: str = path
+        self.page_size: int = page_size
+        self.margin: int = margin
+
+        self.balances: dict[NSID, int] = {}
+        self.last: tuple[int, NSID] | None = None
+        self.recent: dict[NSID, int] = {}
+
+        self.load()
+
+    def load(self) -> None:
+        """Charge le dernier point de contrôle, s'il existe."""
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path) as file:
+            _data = json.load(file)
+
+        self.balances = { NSID(id): amount for id, amount in _data['balances'].items() }
+        self.last = tuple(_data['last']) if _data['last'] else None
+        self.recent = { NSID(id): date for id, date in _data.get('recent', {}).items() }
+
+    def save(self) -> None:
+        """Enregistre un point de contrôle. Le fichier est remplacé d'un seul coup pour ne jamais être à moitié écrit."""
+
+        _data = {
+            'last': self.last,
+            'recent': self.recent,
+            'balances': self.balances
+        }
+
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump(_data, file)
+
+        os.replace(self.path + '.tmp', self.path)
+
+    def baseline(self) -> int:
+        """
+        Prend le solde actuel de chaque compte comme point de départ: seules les transactions archivées ensuite seront rejouées.\n
+        À lancer quand aucune transaction n'est en cours, sinon une transaction faite pendant la lecture des comptes peut être comptée deux fois.
+
+        ## Renvoie
+        - `int`: Nombre de comptes lus
+        """
+
+        _last = self.instance._select_many('archives', 'id, date', order = ('date', 'id'), desc = True, limit = 1, _type = 'transaction')
+        balances = {}
+
+        for page in self.instance._stream_from_db('accounts', 'id, amount', page_size = self.page_size):
+            for _data in page:
+                balances[NSID(_data['id'])] = _data['amount']
+
+        self.balances = balances
+        self.last = (_last[0]['date'], _last[0]['id']) if _last else None
+        self.recent = {}
+
+        if self.last is not None: # Les transactions de la période relue sont déjà dans les soldes
+            for page in self.instance._stream_from_db('archives', 'id, date', key = ('date', 'id'), page_size = self.page_size, _type = 'transaction', date__gte = self.last[0] - self.margin):
+                self.recent.update((NSID(_data['id']), _data['date']) for _data in page)
+
+        self.save()
+
+        return len(balances)
+
+    def update(self) -> int:
+        """
+        Traite les transactions archivées depuis le dernier point de contrôle.
+
+        ## Renvoie
+        - `int`: Nombre de transactions traitées
+        """
+
+        count = 0
+        query = { '_type': 'transaction' }
+
+        if self.last is not None: # Relecture des `margin` dernières secondes
+            query['date__gte'] = self.last[0] - self.margin
+
+        recent = self.recent
+        pages = self.instance._stream_from_db('archives', 'id, date, author, target, amount:details->amount', key = ('date', 'id'), page_size = self.page_size, **query)
+
+        for page in pages:
+            for _data in page:
+                id = NSID(_data['id'])
+
+                if id in recent: # Déjà traitée lors d'une exécution précédente
+                    continue
+
+                amount = _data['amount'] or 0
+                author, target = NSID(_data['author']), NSID(_data['target'])
+
+                self.balances[author] = self.balances.get(author, 0) - amount
+                self.balances[target] = self.balances.get(target, 0) + amount
+
+                recent[id] = _data['date']
+                count += 1
+
+                if self.last is None or _data['date'] >= self.last[0]:
+                    self.last = (_data['date'], id)
+
+        if self.last is not None:
+            self.recent = { id: date for id, date in recent.items() if date >= self.last[0] - self.margin }
+
+        return count
+
+    def drifts(self, tolerance: int = 0) -> dict[NSID, tuple[int, int]]:
+        """
+        Compare le solde attendu de chaque compte à son solde réel.
+
+        ## Paramètres
+        tolerance: `int`\n
+            Écart toléré avant qu'un compte soit signalé
+
+        ## Renvoie
+        - `dict[NSID, tuple[int, int]]`: Solde attendu et solde réel des comptes en écart, indexés par ID
+        """
+
+        drifts = {}
+
+        for page in self.instance._stream_from_db('accounts', 'id, amount', page_size = self.page_size):
+            for _data in page:
+                id = NSID(_data['id'])
+                expected = self.balances.get(id, 0)
+
+                if abs(_data['amount'] - expected) > tolerance:
+                    drifts[id] = (expected, _data['amount'])
+
+        return drifts
+
+    def run(self, tolerance: int = 0) -> dict[NSID, tuple[int, int]]:
+        """
+        Traite les nouvelles transactions, enregistre un point de contrôle et renvoie les comptes en écart (voir `drifts`).
+        """
+
+        if self.update():
+            self.save()
+
+        return self.drifts(tolerance)
@@ -0,0 +1,342 @@
+"""
+Réplique locale (SQLite) des tables de la base, pour les lectures lourdes (statistiques, rapports...).
+
+- `sync_replica` copie les tables dans un fichier SQLite. Les tables dont les lignes ne sont jamais modifiées ni supprimées (ex: `archives`) peuvent être synchronisées à partir d'une colonne de date: seules les lignes plus récentes que la dernière synchronisation sont récupérées. Les autres sont recopiées entièrement.
+- `ReplicaClient` lit ce fichier avec la même interface que le client Supabase, ce qui permet à une instance de l'utiliser en lecture seule (`Instance.use_replica`).
+
+Les lectures qui passent par une fonction côté serveur ne fonctionnent pas sur une réplique (voir `ReplicaClient`).
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import typing
+
+from .cls.base import Instance
+
+TABLES: tuple[str] = ('positions', 'individuals', 'organizations', 'accounts', 'archives', 'items', 'market', 'inventories', 'votes', 'lawsuits', 'voters', 'functions', 'mandate') # Tables de la base, utilisées aussi par `.snapshot`
+
+DEFAULT_TABLES: dict[str, str | None] = { table: 'date' if table == 'archives' else None for table in TABLES } # `archives` est la seule table où les lignes ne sont qu'ajoutées
+
+_keys: dict[str, tuple[str, ...]] = { 'voters': ('vote_id', 'voter_id') } # Clé primaire des tables sans colonne `id`
+
+def _stream_key(table: str) -> str | tuple[str, str]: # Clé de pagination de `Instance._stream_from_db`
+    key = _keys.get(table, ('id',))
+
+    return key if len(key) > 1 else key[0]
+
+_types = { bool: 'INTEGER', int: 'INTEGER', float: 'REAL', str: 'TEXT' }
+_identifier = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _quote(name: str) -> str:
+    if not _identifier.match(name):
+        raise ValueError(f"Invalid column or table name: {name}")
+
+    return f'"{name}"'
+
+def _expression(column: str) -> str:
+    column = column.strip()
+    parts = re.split(r"->>?", column)
+
+    if len(parts) == 1:
+        return _quote(column)
+
+    return f"json_extract({_quote(parts[0])}, '$.{'.'.join(part for part in parts[1:] if _identifier.match(part))}')"
+
+def _split(text: str) -> list[str]: # Découpe une liste séparée par des virgules, sans couper dans les parenthèses
+    parts, depth, current = [], 0, ''
+
+    for char in text:
+        if char == ',' and not depth:
+            parts.append(current)
+            current = ''
+            continue
+
+        depth += (char == '(') - (char == ')')
+        current += char
+
+    return parts + [ current ] if current else parts
+
+class _Response:
+    def __init__(self, data: list, count: int = None) -> None:
+        self.data = data
+        self.count = count
+
+class _ReplicaQuery:
+    _operators = { 'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=' }
+
+    def __init__(self, replica: "ReplicaClient", table: str) -> None:
+        self.replica = replica
+        self.table = table
+
+        self._columns = '*'
+        self._count = None
+        self._head = False
+        self._where: list[tuple[str, list]] = []
+        self._order: list[tuple[str, bool]] = []
+        self._offset = 0
+        self._limit = None
+
+    def select(self, *columns: str, count: typing.Any = None, head: bool = None) -> "_ReplicaQuery":
+        self._columns = ','.join(columns) or '*'
+        self._count = count
+        self._head = bool(head)
+
+        return self
+
+    def _compare(self, column: str, op: str, value: typing.Any) -> "_ReplicaQuery":
+        self._where.append((f"{_expression(column)} {self._operators[op]} ?", [ value ]))
+
+        return self
+
+    def eq(self, column: str, value: typing.Any): return self._compare(column, 'eq', value)
+    def neq(self, column: str, value: typing.Any): return self._compare(column, 'neq', value)
+    def gt(self, column: str, value: typing.Any): return self._compare(column, 'gt', value)
+    def gte(self, column: str, value: typing.Any): return self._compare(column, 'gte', value)
+    def lt(self, column: str, value: typing.Any): return self._compare(column, 'lt', value)
+    def lte(self, column: str, value: typing.Any): return self._compare(column, 'lte', value)
+
+    def in_(self, column: str, values: typing.Iterable) -> "_ReplicaQuery":
+        values = list(values)
+        self._where.append((f"{_expression(column)} IN ({', '.join('?' * len(values))})" if values else "0", values))
+
+        return self
+
+    def or_(self, filters: str) -> "_ReplicaQuery":
+        self._where.append(self._parse(filters, 'or'))
+
+        return self
+
+    def _parse(self, filters: str, joiner: str) -> tuple[str, list]:
+        clauses, params = [], []
+
+        for part in _split(filters):
+            match = re.fullmatch(r"(and|or)\((.*)\)", part)
+
+            if match:
+                clause, _params = self._parse(match.group(2), match.group(1))
+            else:
+                column, op, value = part.split('.', 2)
+                clause, _params = f"{_expression(column)} {self._operators[op]} ?", [ value ]
+
+            clauses.append(clause)
+            params.extend(_params)
+
+        return f"({f' {joiner.upper()} '.join(clauses)})", params
+
+    def order(self, column: str, desc: bool = False) -> "_ReplicaQuery":
+        self._order.append((column, desc))
+
+        return self
+
+    def range(self, start: int, end: int) -> "_ReplicaQuery":
+        self._offset = start
+        self._limit = end - start + 1
+
+        return self
+
+    def offset(self, size: int) -> "_ReplicaQuery":
+        self._offset = size
+
+        return self
+
+    def limit(self, size: int) -> "_ReplicaQuery":
+        self._limit = size
+
+        return self
+
+    def execute(self) -> _Response:
+        if not self.replica._exists(self.table):
+            if self.replica._synced(self.table): # Table copiée mais vide
+                return _Response([], 0)
+
+            raise LookupError(f"Table {self.table} is not in the replica, add it to the tables of sync_replica.")
+
+        where = ' AND '.join(clause for clause, _ in self._where) or '1'
+        params = [ value for _, values in self._where for value in values ]
+
+        count = None
+
+        if self._count:
+            with self.replica._lock:
+                count = self.replica.db.execute(f"SELECT COUNT(*) FROM {_quote(self.table)} WHERE {where}", params).fetchone()[0]
+
+        if self._head:
+            return _Response([], count)
+
+        if self._columns.strip() == '*':
+            columns = '*'
+        else:
+            columns = ', '.join(f"{_expression(path)} AS {_quote(alias or path.split('->')[-1].lstrip('>'))}" for alias, _, path in (column.strip().rpartition(':') for column in self._columns.split(',')))
+
+        sql = f"SELECT {columns} FROM {_quote(self.table)} WHERE {where}"
+
+        if self._order:
+            sql += " ORDER BY " + ', '.join(f"{_expression(column)} {'DESC' if desc else 'ASC'}" for column, desc in self._order)
+
+        if self._limit is not None or self._offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [ -1 if self._limit is None else self._limit, self._offset ]
+
+        with self.replica._lock: # La connexion est partagée entre les threads de l'instance
+            cursor = self.replica.db.execute(sql, params)
+            names = [ description[0] for description in cursor.description ]
+            rows = cursor.fetchall()
+
+        return _Response([ self.replica._decode(self.table, dict(zip(names, row))) for row in rows ], count)
+
+    def _refuse(self, *args, **kwargs):
+        raise PermissionError("The replica is read-only.")
+
+    insert = upsert = update = delete = _refuse
+
+class ReplicaClient:
+    """
+    Client en lecture seule sur une réplique SQLite, avec la même interface de requêtes que le client Supabase (`from_(...).select(...).eq(...).execute()`).\n
+    Une requête sur une table qui n'a jamais été synchronisée lève une `LookupError`.\n
+    Les fonctions côté serveur (`rpc`) ne sont pas disponibles et lèvent une `PermissionError`, comme toutes les écritures. Cela concerne aussi les lectures qui en dépendent:
+    - `RepublicInstance.get_officials`, `get_official` et `get_institutions` (`count_official_actions`)
+    - `EconomyInstance.get_best_ask` et `get_best_asks` (`best_asks`)
+    - `EconomyInstance.get_wealth`, `get_richest` et `get_bank_totals` (`wealth_by_owner`, `wealth_by_bank`)
+
+    ## Paramètres
+    path: `str`\n
+        Chemin du fichier SQLite
+    storage: `typing.Any`\n
+        Client de stockage de fichiers à conserver (facultatif)
+    """
+
+    def __init__(self, path: str, storage: typing.Any = None) -> None:
+        self.path: str = path
+        self.storage = storage
+        self.db = sqlite3.connect(path, check_same_thread = False)
+        self._lock = threading.Lock()
+
+        self.db.execute("CREATE TABLE IF NOT EXISTS _columns (tbl TEXT, col TEXT, kind TEXT, PRIMARY KEY (tbl, col))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS _sync (tbl TEXT PRIMARY KEY, watermark, last_id TEXT)")
+
+        self._kinds: dict[str, dict[str, str]] = {}
+
+        for table, column, kind in self.db.execute("SELECT tbl, col, kind FROM _columns"):
+            self._kinds.setdefault(table, {})[column] = kind
+
+    def from_(self, table: str) -> _ReplicaQuery:
+        return _ReplicaQuery(self, table)
+
+    table = from_
+
+    def rpc(self, *args, **kwargs):
+        raise PermissionError("Server-side functions are not available on a replica.")
+
+    def _exists(self, table: str) -> bool:
+        return table in self._kinds
+
+    def _synced(self, table: str) -> bool:
+        with self._lock:
+            return self.db.execute("SELECT 1 FROM _sync WHERE tbl = ?", (table,)).fetchone() is not None
+
+    def _decode(self, table: str, row: dict) -> dict:
+        kinds = self._kinds.get(table, {})
+
+        for column, value in row.items():
+            if value is None:
+                continue
+
+            if kinds.get(column) == 'json':
+                row[column] = json.loads(value)
+            elif kinds.get(column) == 'bool':
+                row[column] = bool(value)
+
+        return row
+
+    def _write(self, table: str, rows: list[dict]) -> None:
+        kinds = self._kinds.setdefault(table, {})
+        created = bool(kinds)
+        columns = {}
+
+        # Les colonnes sont typées d'après la première valeur non nulle, pour que SQLite convertisse les valeurs des filtres
+        for column in dict.fromkeys(column for row in rows for column in row):
+            if column in kinds:
+                continue
+
+            value = next((row[column] for row in rows if row.get(column) is not None), None)
+            kind = 'json' if isinstance(value, (dict, list)) else 'bool' if isinstance(value, bool) else 'value'
+            columns[column] = ('TEXT' if kind == 'json' else _types.get(type(value), ''), kind)
+
+        if created:
+            for column, (_type, _) in columns.items():
+                self.db.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(column)} {_type}")
+        elif columns:
+            key = _keys.get(table, ('id',))
+            definitions = [ f"{_quote(column)} {_type}" for column, (_type, _) in columns.items() ]
+
+            if all(column in columns for column in key): # Sans sa clé, la table est créée sans clé primaire
+                definitions.append(f"PRIMARY KEY ({', '.join(map(_quote, key))})")
+
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({', '.join(definitions)})")
+
+        for column, (_, kind) in columns.items():
+            self.db.execute("INSERT OR REPLACE INTO _columns VALUES (?, ?, ?)", (table, column, kind))
+            kinds[column] = kind
+
+        for row in rows:
+            columns = list(row.keys())
+            values = [ json.dumps(row[column]) if kinds[column] == 'json' and row[column] is not None else row[column] for column in columns ]
+
+            self.db.execute(f"INSERT OR REPLACE INTO {_quote(table)} ({', '.join(map(_quote, columns))}) VALUES ({', '.join('?' * len(columns))})", values)
+
+    def _clear(self, table: str) -> None:
+        if self._exists(table):
+            self.db.execute(f"DELETE FROM {_quote(table)}")
+
+    def close(self) -> None:
+        self.db.close()
+
+def sync_replica(instance: Instance, path: str, tables: dict[str, str | None] = None, page_size: int = 1000) -> dict[str, int]:
+    """
+    Met à jour la réplique locale à partir de la base.
+
+    ## Paramètres
+    instance: `.Instance`\n
+        Instance connectée à la base
+    path: `str`\n
+        Chemin du fichier SQLite (créé s'il n'existe pas)
+    tables: `dict[str, str | None]`\n
+        Tables à copier et leur colonne de synchronisation. Avec `None`, la table est recopiée entièrement. Par défaut, voir `DEFAULT_TABLES`.\n
+        Une colonne de synchronisation ne convient qu'aux tables dont les lignes ne sont jamais modifiées ni supprimées, ou à une colonne mise à jour à chaque modification (`updated_at`). Les lignes déjà copiées ne sont pas relues: leurs modifications (et leurs suppressions, dans tous les cas) n'atteignent pas la réplique.
+    page_size: `int`\n
+        Nombre de lignes par requête
+
+    ## Renvoie
+    - `dict[str, int]`: Nombre de lignes récupérées par table
+    """
+
+    replica = ReplicaClient(path)
+    counts = {}
+
+    try:
+        for table, watermark in (tables or DEFAULT_TABLES).items():
+            counts[table] = 0
+
+            if watermark:
+                state = replica.db.execute("SELECT watermark, last_id FROM _sync WHERE tbl = ?", (table,)).fetchone()
+                pages = instance._stream_from_db(table, '*', key = (watermark, 'id'), page_size = page_size, start = state if state and state[0] is not None else None)
+            else:
+                replica._clear(table)
+                pages = instance._stream_from_db(table, '*', key = _stream_key(table), page_size = page_size)
+
+            for page in pages:
+                replica._write(table, page)
+                counts[table] += len(page)
+
+                if watermark:
+                    replica.db.execute("INSERT OR REPLACE INTO _sync VALUES (?, ?, ?)", (table, page[-1][watermark], page[-1]['id']))
+
+            replica.db.execute("INSERT OR IGNORE INTO _sync VALUES (?, NULL, NULL)", (table,)) # Table synchronisée, même vide
+
+            replica.db.commit() # Chaque table est remplacée ou complétée d'un seul coup pour les lecteurs
+    finally:
+        replica.close()
+
+    return counts
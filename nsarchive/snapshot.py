@@ -0,0 +1,266 @@
+"""
+Copies complètes de la base (sauvegardes, migrations, jeux de données pour les tests de performance).
+
+Un snapshot est un dossier qui contient un fichier `manifest.json` et, pour chaque table, des blocs (chunks) de lignes rangées en colonnes:
+
+- Les colonnes numériques (entiers, décimaux, booléens) sont écrites en binaire brut (`.bin`), ce qui permet de les ouvrir en mémoire partagée (`mmap`) sans les charger.
+- Les autres colonnes (textes, JSON, colonnes avec des valeurs nulles) sont écrites en JSON compressé (`.json.gz`).
+
+Utilisation en ligne de commande:
+
+```
+python -m nsarchive.snapshot export <dossier> --id <projet> --token <clé>
+python -m nsarchive.snapshot import <dossier> --id <projet> --token <clé>
+```
+"""
+
+import argparse
+import array
+import gzip
+import json
+import mmap
+import os
+import sys
+import time
+import typing
+
+from .cls.base import Instance
+from .replica import TABLES, _stream_key
+
+_formats: dict[str, str] = { 'int': 'q', 'float': 'd', 'bool': 'b' } # Format `array` de chaque type de colonne binaire
+
+def _kind(values: list) -> str:
+    types = set(map(type, values))
+
+    if types == { bool }:
+        return 'bool'
+    elif types == { int } and all(-2 ** 63 <= value < 2 ** 63 for value in values):
+        return 'int'
+    elif types and types <= { int, float }:
+        return 'float'
+    else:
+        return 'json'
+
+def _write_chunk(folder: str, index: int, rows: list[dict]) -> dict:
+    columns = {}
+
+    for name in dict.fromkeys(column for row in rows for column in row):
+        values = [ row.get(name) for row in rows ]
+        kind = _kind(values)
+
+        if kind == 'json':
+            with gzip.open(os.path.join(folder, f"{index:05d}.{name}.json.gz"), 'wt') as file:
+                json.dump(values, file)
+        else:
+            with open(os.path.join(folder, f"{index:05d}.{name}.bin"), 'wb') as file:
+                array.array(_formats[kind], values).tofile(file)
+
+        columns[name] = kind
+
+    return { 'rows': len(rows), 'columns': columns }
+
+def export_snapshot(instance: Instance, path: str, tables: typing.Iterable[str] = TABLES, chunk_size: int = 10000, page_size: int = 1000) -> dict:
+    """
+    Copie les tables de la base dans un snapshot.
+
+    ## Paramètres
+    instance: `.Instance`\n
+        Instance connectée à la base
+    path: `str`\n
+        Dossier du snapshot (créé s'il n'existe pas)
+    tables: `list[str]`\n
+        Tables à copier
+    chunk_size: `int`\n
+        Nombre de lignes par bloc
+    page_size: `int`\n
+        Nombre de lignes par requête
+
+    ## Renvoie
+    - `dict`: Manifeste du snapshot
+    """
+
+    manifest = {
+        'version': 1,
+        'created': round(time.time()),
+        'byteorder': sys.byteorder,
+        'tables': {}
+    }
+
+    for table in tables:
+        folder = os.path.join(path, table)
+        os.makedirs(folder, exist_ok = True)
+
+        chunks, buffer = [], []
+
+        for page in instance._stream_from_db(table, '*', key = _stream_key(table), page_size = page_size):
+            buffer.extend(page)
+
+            while len(buffer) >= chunk_size:
+                chunks.append(_write_chunk(folder, len(chunks), buffer[:chunk_size]))
+                del buffer[:chunk_size]
+
+        if buffer:
+            chunks.append(_write_chunk(folder, len(chunks), buffer))
+
+        manifest['tables'][table] = {
+            'rows': sum(chunk['rows'] for chunk in chunks),
+            'chunks': chunks
+        }
+
+    # Le manifeste est écrit en dernier: un snapshot interrompu n'est jamais lisible à moitié
+    with open(os.path.join(path, 'manifest.json.tmp'), 'w') as file:
+        json.dump(manifest, file, indent = 4)
+
+    os.replace(os.path.join(path, 'manifest.json.tmp'), os.path.join(path, 'manifest.json'))
+
+    return manifest
+
+class Snapshot:
+    """
+    Lecture d'un snapshot. Les colonnes binaires sont ouvertes en mémoire partagée et ne sont lues qu'à l'accès.
+
+    ## Paramètres
+    path: `str`\n
+        Dossier du snapshot
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+
+        with open(os.path.join(path, 'manifest.json')) as file:
+            self.manifest: dict = json.load(file)
+
+        self._maps: list[mmap.mmap] = []
+
+    @property
+    def tables(self) -> dict[str, int]:
+        """Nombre de lignes de chaque table"""
+
+        return { table: _data['rows'] for table, _data in self.manifest['tables'].items() }
+
+    def _read(self, table: str, index: int, name: str) -> typing.Sequence:
+        kind = self.manifest['tables'][table]['chunks'][index]['columns'].get(name)
+        file_path = os.path.join(self.path, table, f"{index:05d}.{name}")
+
+        if kind is None:
+            return [ None ] * self.manifest['tables'][table]['chunks'][index]['rows']
+        elif kind == 'json':
+            with gzip.open(file_path + '.json.gz', 'rt') as file:
+                return json.load(file)
+
+        with open(file_path + '.bin', 'rb') as file:
+            if self.manifest['byteorder'] != sys.byteorder: # Le snapshot vient d'une machine d'un autre boutisme
+                values = array.array(_formats[kind])
+                values.frombytes(file.read())
+                values.byteswap()
+
+                return values
+
+            if not os.fstat(file.fileno()).st_size:
+                return memoryview(b'').cast(_formats[kind])
+
+            _map = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+            self._maps.append(_map)
+
+        return memoryview(_map).cast(_formats[kind])
+
+    def column(self, table: str, name: str) -> list[typing.Sequence]:
+        """
+        Renvoie une colonne d'une table, bloc par bloc.\n
+        Les colonnes binaires sont des `memoryview` sur le fichier (utilisables directement avec `numpy.frombuffer`), les autres des listes.
+
+        ## Paramètres
+        table: `str`\n
+            Nom de la table
+        name: `str`\n
+            Nom de la colonne
+        """
+
+        return [ self._read(table, index, name) for index in range(len(self.manifest['tables'][table]['chunks'])) ]
+
+    def rows(self, table: str) -> typing.Iterator[list[dict]]:
+        """
+        Parcourt les lignes d'une table, bloc par bloc.
+        """
+
+        for index, chunk in enumerate(self.manifest['tables'][table]['chunks']):
+            columns = {}
+
+            for name, kind in chunk['columns'].items():
+                values = self._read(table, index, name)
+                columns[name] = [ bool(value) for value in values ] if kind == 'bool' else list(values)
+
+            yield [ dict(zip(columns, values)) for values in zip(*columns.values()) ]
+
+    def close(self) -> None:
+        """Ferme les fichiers ouverts en mémoire partagée. Les colonnes déjà renvoyées ne doivent plus être utilisées."""
+
+        for _map in self._maps:
+            try:
+                _map.close()
+            except BufferError: # Une vue sur le fichier est encore utilisée
+                pass
+
+        self._maps.clear()
+
+def import_snapshot(instance: Instance, path: str, tables: typing.Iterable[str] = None, batch_size: int = 500) -> dict[str, int]:
+    """
+    Charge un snapshot dans une base. Les lignes sont écrites par lots, et celles qui existent déjà sont remplacées.
+
+    ## Paramètres
+    instance: `.Instance`\n
+        Instance connectée à la base de destination
+    path: `str`\n
+        Dossier du snapshot
+    tables: `list[str]`\n
+        Tables à charger (par défaut, toutes celles du snapshot)
+    batch_size: `int`\n
+        Nombre de lignes par requête
+
+    ## Renvoie
+    - `dict[str, int]`: Nombre de lignes écrites par table
+    """
+
+    snapshot = Snapshot(path)
+    counts = {}
+
+    try:
+        for table in tables or snapshot.tables:
+            counts[table] = 0
+
+            for rows in snapshot.rows(table):
+                for i in range(0, len(rows), batch_size):
+                    instance._put_in_db(table, rows[i:i + batch_size])
+
+                counts[table] += len(rows)
+    finally:
+        snapshot.close()
+
+    return counts
+
+def main(args: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog = "python -m nsarchive.snapshot", description = "Export ou import d'un snapshot de la base")
+    parser.add_argument('action', choices = ('export', 'import'))
+    parser.add_argument('path', help = "Dossier du snapshot")
+    parser.add_argument('--id', required = True, help = "ID du projet Supabase")
+    parser.add_argument('--token', required = True, help = "Clé d'accès au projet")
+    parser.add_argument('--tables', nargs = '+', help = "Tables à traiter (par défaut, toutes)")
+    parser.add_argument('--chunk-size', type = int, default = 10000, help = "Nombre de lignes par bloc (export)")
+
+    args = parser.parse_args(args)
+
+    from supabase import create_client
+
+    instance = Instance(create_client(f"https://{args.id}.supabase.co", args.token))
+
+    if args.action == 'export':
+        manifest = export_snapshot(instance, args.path, args.tables or TABLES, chunk_size = args.chunk_size)
+        counts = { table: _data['rows'] for table, _data in manifest['tables'].items() }
+    else:
+        counts = import_snapshot(instance, args.path, args.tables)
+
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+
+if __name__ == '__main__':
+    main()
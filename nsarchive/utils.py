@@ -1,9 +1,14 @@
+import functools
 import io
 import math
 import os
-from PIL import Image
 
+# Pillow n'est importé qu'au premier traitement d'image
+
+@functools.cache
 def open_asset(path: str) -> bytes:
+    from PIL import Image
+
     curr_dir = os.path.dirname(os.path.abspath(os.path.join(__file__)))
     asset_path = os.path.join(curr_dir, 'assets', path)
 
@@ -15,6 +20,8 @@ def open_asset(path: str) -> bytes:
     return val.getvalue()
 
 def compress_image(data: bytes, _max: int = 1000 ** 2) -> bytes:
+    from PIL import Image
+
     img = Image.open(io.BytesIO(data))
     size = 2 * ( math.floor(math.sqrt(_max),) )
 
@@ -0,0 +1,45 @@
+import sys
+
+import pytest
+
+from nsarchive.replica import ReplicaClient
+
+@pytest.fixture
+def make_replica(tmp_path):
+    """
+    Crée une réplique SQLite remplie avec les lignes données (`{ table: [ lignes ] }`), utilisée comme base en lecture seule.
+    """
+
+    clients = []
+
+    def make(tables: dict[str, list[dict]], name: str = 'base.db') -> ReplicaClient:
+        client = ReplicaClient(str(tmp_path / name))
+
+        for table, rows in tables.items():
+            if rows:
+                client._write(table, rows)
+
+            client.db.execute("INSERT OR IGNORE INTO _sync VALUES (?, NULL, NULL)", (table,))
+
+        client.db.commit()
+        clients.append(client)
+
+        return client
+
+    yield make
+
+    for client in clients:
+        client.close()
+
+@pytest.fixture
+def make_instance(monkeypatch):
+    """
+    Crée une instance dont le client Supabase est remplacé par le client donné (ex: une `ReplicaClient`).
+    """
+
+    def make(cls, client):
+        monkeypatch.setattr(sys.modules[cls.__module__], 'create_client', lambda url, token : client)
+
+        return cls('test', 'token')
+
+    return make
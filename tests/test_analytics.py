@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from nsarchive import analytics
+from nsarchive.instances._economy import EconomyInstance
+
+def test_gini():
+    assert analytics.gini(np.array([ 5, 5, 5, 5 ])) == pytest.approx(0)
+    assert analytics.gini(np.array([ 0, 0, 0, 10 ])) == pytest.approx(0.75)
+    assert analytics.gini(np.array([ -5, 0 ])) == 0.0
+
+def test_accounts(make_replica, make_instance):
+    base = make_replica({
+        'accounts': [
+            { 'id': format(i, 'X'), 'owner_id': '1', 'bank': 'HexaBank', 'amount': i * 10, 'income': 0, 'frozen': i == 3 }
+            for i in range(1, 6)
+        ]
+    })
+
+    accounts = analytics.load_accounts(make_instance(EconomyInstance, base), page_size = 2)
+
+    assert accounts['amount'].tolist() == [ 10, 20, 30, 40, 50 ]
+    assert accounts['frozen'].dtype == np.bool_
+    assert analytics.money_supply(accounts) == 150
+    assert analytics.money_supply(accounts, include_frozen = False) == 120
+
+    counts, edges = analytics.balance_histogram(accounts, bins = [ 0, 25, 100 ])
+
+    assert counts.tolist() == [ 2, 3 ]
+
+def test_daily_volume(make_replica, make_instance):
+    day = 86400
+    base = make_replica({
+        'archives': [
+            { 'id': '1', '_type': 'transaction', 'date': day + 10, 'author': 'A', 'target': 'B', 'details': { 'amount': 5 } },
+            { 'id': '2', '_type': 'transaction', 'date': day + 20, 'author': 'A', 'target': 'B', 'details': { 'amount': 7 } },
+            { 'id': '3', '_type': 'transaction', 'date': 3 * day, 'author': 'B', 'target': 'A', 'details': { 'amount': 1 } },
+            { 'id': '4', '_type': 'sanction', 'date': day, 'author': '1', 'target': 'A', 'details': { 'duration': 0 } }
+        ]
+    })
+
+    transactions = analytics.load_transactions(make_instance(EconomyInstance, base), since = day, parties = True)
+
+    assert transactions['amount'].tolist() == [ 5, 7, 1 ]
+    assert transactions['author'].tolist() == [ 'A', 'A', 'B' ]
+
+    days, volume, count = analytics.daily_volume(transactions)
+
+    assert days.tolist() == [ day, 3 * day ]
+    assert volume.tolist() == [ 12, 1 ]
+    assert count.tolist() == [ 2, 1 ]
@@ -0,0 +1,107 @@
+import pytest
+
+from nsarchive import AccountFrozenError, InsufficientFundsError, RessourceNotFoundError
+from nsarchive.instances._economy import EconomyInstance
+
+class _Recorder:
+    def __init__(self, result = None) -> None:
+        self.result = result
+        self.calls = []
+
+    def __call__(self, function: str, params: dict):
+        self.calls.append((function, params))
+
+        return self.result
+
+@pytest.fixture
+def instance(make_replica, make_instance):
+    return make_instance(EconomyInstance, make_replica({}))
+
+def test_apply_rate_filters(instance, monkeypatch):
+    rpc = _Recorder(3)
+    monkeypatch.setattr(instance, '_call_rpc', rpc)
+
+    assert instance.apply_rate(-5, bank = 'HexaBank', id = ('1', '2')) == 3
+    assert rpc.calls == [ ('apply_rate', { 'rate': -5, 'filters': { 'bank': 'HexaBank', 'id': [ '1', '2' ] } }) ]
+
+@pytest.mark.parametrize('query', [ { 'amount__gt': 0 }, { 'or_': "id.eq.1" } ])
+def test_apply_rate_rejects(instance, monkeypatch, query):
+    rpc = _Recorder()
+    monkeypatch.setattr(instance, '_call_rpc', rpc)
+
+    with pytest.raises(ValueError):
+        instance.apply_rate(2, **query)
+
+    assert rpc.calls == []
+
+@pytest.mark.parametrize('result, error', [
+    ({ 'error': 'not_found', 'account': '1' }, RessourceNotFoundError),
+    ({ 'error': 'frozen', 'account': '1' }, AccountFrozenError),
+    ({ 'error': 'funds', 'account': '1' }, InsufficientFundsError),
+    ({ 'error': 'sale', 'sale': 'A' }, RessourceNotFoundError),
+    ({ 'error': 'deadlock' }, RuntimeError),
+    (None, RuntimeError),
+    ([], RuntimeError),
+    ('{}', RuntimeError)
+])
+def test_raise_rpc_error(instance, result, error):
+    with pytest.raises(error):
+        instance._raise_rpc_error('transfer_many', result)
+
+def test_raise_rpc_error_success(instance):
+    assert instance._raise_rpc_error('transfer_many', {}) is None
+    assert instance._raise_rpc_error('buy_sale', { 'item': 'A', 'quantity': 1, 'cost': 5 }) is None
+
+def test_transfer_many(instance, monkeypatch):
+    rpc = _Recorder({})
+    monkeypatch.setattr(instance, '_call_rpc', rpc)
+
+    archives = instance.transfer_many([ ('1', '2', 10, "Loyer"), ('2', '3', 5, None) ])
+
+    assert [ (archive.author, archive.target, archive.details['amount']) for archive in archives ] == [ ('1', '2', 10), ('2', '3', 5) ]
+    assert len({ archive.id for archive in archives }) == 2
+    assert [ _data['_type'] for _data in rpc.calls[0][1]['transfers'] ] == [ 'transaction', 'transaction' ]
+
+    rpc.result = { 'error': 'funds', 'account': '1' }
+
+    with pytest.raises(InsufficientFundsError):
+        instance.transfer('1', '2', 10)
+
+    with pytest.raises(ValueError):
+        instance.transfer('1', '2', 0)
+
+def test_buy(instance, monkeypatch):
+    rpc = _Recorder({ 'item': 'A', 'quantity': 2, 'cost': 30 })
+    monkeypatch.setattr(instance, '_call_rpc', rpc)
+    instance._book['A'] = (0, None)
+
+    assert instance.buy('5', '1', 2) == (2, 30)
+    assert 'A' not in instance._book # La meilleure offre a pu changer
+
+    rpc.result = { 'error': 'sale', 'sale': '5' }
+
+    with pytest.raises(RessourceNotFoundError):
+        instance.buy('5', '1', 2)
+
+def test_clean_market(make_replica, make_instance, monkeypatch):
+    base = make_replica({
+        'accounts': [
+            { 'id': '10', 'owner_id': 'A', 'frozen': True }, # Compte principal gelé
+            { 'id': '200', 'owner_id': 'A', 'frozen': False },
+            { 'id': '11', 'owner_id': 'B', 'frozen': False }, # Compte secondaire gelé seulement
+            { 'id': '300', 'owner_id': 'B', 'frozen': True },
+            { 'id': '12', 'owner_id': 'C', 'frozen': False }
+        ]
+    })
+
+    instance = make_instance(EconomyInstance, base)
+    deletes = []
+
+    def delete(table: str, **filters) -> int:
+        deletes.append((table, filters))
+        return 1
+
+    monkeypatch.setattr(instance, '_delete_many', delete)
+
+    assert instance.clean_market(chunk_size = 1)['removed'] == 2
+    assert deletes == [ ('market', { 'quantity__lte': 0 }), ('market', { 'seller_id': [ 'A' ] }) ]
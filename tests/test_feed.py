@@ -0,0 +1,81 @@
+from nsarchive import ChangeEvent, ChangeFeed
+from nsarchive.instances._economy import EconomyInstance
+from nsarchive.instances._entities import EntityInstance
+
+def test_publish():
+    feed = ChangeFeed()
+    events = []
+
+    feed.subscribe('items', events.append)
+    feed.subscribe('items', lambda event : 1 / 0) # Une erreur n'empêche pas les autres abonnés de recevoir l'évènement
+
+    feed.publish(ChangeEvent('items', 'insert', { 'id': 'A' }))
+    feed.publish(ChangeEvent('market', 'insert', { 'id': 'B' }))
+
+    assert [ (event.type, event.id) for event in events ] == [ ('INSERT', 'A') ]
+    assert ChangeEvent('items', 'DELETE', old_record = { 'id': 'C' }).id == 'C'
+
+def test_economy_caches(make_replica, make_instance):
+    base = make_replica({ 'items': [ { 'id': 'A', 'title': "Pomme", 'emoji': None } ] })
+    instance = make_instance(EconomyInstance, base)
+
+    feed = ChangeFeed()
+    instance.attach_feed(feed)
+
+    assert instance.get_item('A').title == "Pomme"
+
+    base._write('items', [ { 'id': 'A', 'title': "Poire", 'emoji': None } ]) # Écriture d'un autre processus
+
+    assert instance.get_item('A').title == "Pomme" # Cache
+
+    feed.publish(ChangeEvent('items', 'UPDATE', { 'id': 'A', 'title': "Poire", 'emoji': None }))
+
+    assert instance.get_item('A').title == "Poire"
+
+    feed.publish(ChangeEvent('items', 'DELETE', old_record = { 'id': 'A' }))
+
+    assert 'A' not in instance._items
+
+    instance._book['A'] = (0, None)
+    instance._book['B'] = (0, None)
+    feed.publish(ChangeEvent('market', 'UPDATE', { 'id': '1', 'item': 'A' }, { 'id': '1', 'item': 'A' }))
+
+    assert list(instance._book) == [ 'B' ]
+
+    feed.publish(ChangeEvent('market', 'DELETE', old_record = { 'id': '2' })) # Item inconnu: tout le carnet est vidé
+
+    assert not instance._book
+
+def test_name_index(make_replica, make_instance):
+    base = make_replica({ 'individuals': [ { 'id': 'A', 'name': "Martin" } ], 'organizations': [] })
+    instance = make_instance(EntityInstance, base)
+
+    feed = ChangeFeed()
+    instance.attach_feed(feed)
+
+    assert [ id for id, _, _ in instance.search_entities('martin') ] == [ 'A' ]
+
+    feed.publish(ChangeEvent('individuals', 'UPDATE', { 'id': 'A', 'name': "Paul" }))
+    feed.publish(ChangeEvent('organizations', 'INSERT', { 'id': 'B', 'name': "Martin Corp" }))
+
+    assert [ (id, _type) for id, _, _type in instance.search_entities('martin') ] == [ ('B', 'organization') ]
+    assert instance._locations['B'] == 'organizations'
+
+    feed.publish(ChangeEvent('organizations', 'DELETE', old_record = { 'id': 'B' }))
+
+    assert instance.search_entities('martin') == []
+    assert 'B' not in instance._locations
+
+def test_change_during_fetch(make_replica, make_instance, monkeypatch):
+    instance = make_instance(EconomyInstance, make_replica({}))
+    feed = ChangeFeed()
+    instance.attach_feed(feed)
+
+    def best_asks(function: str, params: dict) -> list:
+        feed.publish(ChangeEvent('market', 'UPDATE', { 'id': '1', 'item': 'A' })) # La vente change pendant la requête
+        return [ { 'id': '1', 'item': 'A', 'quantity': 1, 'price': 5, 'seller_id': '2' } ]
+
+    monkeypatch.setattr(instance, '_call_rpc', best_asks)
+
+    assert instance.get_best_ask('A').price == 5
+    assert 'A' not in instance._book # Le résultat, peut-être périmé, n'est pas mis en cache
@@ -0,0 +1,47 @@
+from nsarchive.cls.base import Instance
+from nsarchive.ledger import Reconciler
+
+def transaction(id: str, date: int, author: str, target: str, amount: int) -> dict:
+    return { 'id': id, '_type': 'transaction', 'date': date, 'author': author, 'target': target, 'details': { 'amount': amount } }
+
+def test_late_archives(make_replica, tmp_path):
+    base = make_replica({
+        'accounts': [ { 'id': 'A', 'amount': -15 }, { 'id': 'B', 'amount': 15 } ],
+        'archives': [ transaction('10', 1000, 'A', 'B', 10), transaction('20', 1000, 'A', 'B', 5) ]
+    })
+
+    path = str(tmp_path / 'ledger.json')
+    reconciler = Reconciler(Instance(base), path, page_size = 1, margin = 60)
+
+    assert reconciler.update() == 2
+    assert reconciler.drifts() == {}
+
+    reconciler.save()
+
+    # Enregistrées après le point de contrôle: même seconde avec un ID plus petit, et date plus ancienne
+    base._write('archives', [ transaction('3', 1000, 'A', 'B', 1), transaction('4', 990, 'B', 'A', 2) ])
+    base._write('accounts', [ { 'id': 'A', 'amount': -14 }, { 'id': 'B', 'amount': 14 } ])
+
+    reconciler = Reconciler(Instance(base), path, page_size = 1, margin = 60)
+
+    assert reconciler.update() == 2
+    assert reconciler.update() == 0 # Les archives relues ne sont pas comptées deux fois
+    assert reconciler.drifts() == {}
+    assert reconciler.last[0] == 1000
+
+def test_baseline(make_replica, tmp_path):
+    base = make_replica({
+        'accounts': [ { 'id': 'A', 'amount': 100 }, { 'id': 'B', 'amount': 0 } ],
+        'archives': [ transaction('1', 1000, 'A', 'B', 10) ]
+    })
+
+    reconciler = Reconciler(Instance(base), str(tmp_path / 'ledger.json'))
+
+    assert reconciler.baseline() == 2
+    assert reconciler.update() == 0 # Déjà dans la photographie des comptes
+    assert reconciler.drifts() == {}
+
+    base._write('archives', [ transaction('2', 1001, 'A', 'B', 30) ])
+    base._write('accounts', [ { 'id': 'A', 'amount': 70 }, { 'id': 'B', 'amount': 30 } ])
+
+    assert reconciler.run() == {}
@@ -0,0 +1,47 @@
+import pytest
+
+from nsarchive import NSID
+
+@pytest.fixture(autouse = True)
+def no_pool():
+    yield
+    NSID.intern(False)
+
+def test_conversion():
+    assert NSID(255) == 'FF'
+    assert NSID('ff') == 'FF'
+    assert NSID(-10) == '-A'
+    assert int(NSID('1a')) == 26
+
+    with pytest.raises(TypeError):
+        NSID(1.5)
+
+def test_already_converted():
+    id = NSID(42)
+
+    assert NSID(id) is id
+
+def test_many():
+    ids = NSID.many([ '1', 1, 'a', '1' ])
+
+    assert ids == [ '1', '1', 'A', '1' ]
+    assert all(type(id) is NSID for id in ids)
+    assert ids[0] is ids[3]
+
+def test_intern():
+    assert NSID('abc') is not NSID('abc')
+
+    NSID.intern(max_size = 2)
+
+    assert NSID('abc') is NSID('abc')
+
+    first = NSID('1')
+    NSID('2')
+    NSID('3') # Pool plein: il est vidé
+
+    assert NSID('1') is not first
+    assert len(NSID._pool) <= 2
+
+    NSID.intern(False)
+
+    assert NSID._pool is None
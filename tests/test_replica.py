@@ -0,0 +1,86 @@
+import pytest
+
+from nsarchive.cls.base import Instance
+from nsarchive.instances._economy import EconomyInstance
+from nsarchive.replica import DEFAULT_TABLES, ReplicaClient, sync_replica
+
+TABLES = { 'accounts': None, 'archives': 'date', 'voters': None, 'votes': None }
+
+def source(make_replica) -> Instance:
+    return Instance(make_replica({
+        'accounts': [ { 'id': format(i, 'X'), 'owner_id': '1', 'bank': 'HexaBank', 'amount': i, 'income': 0, 'frozen': False, 'tags': [ i ] } for i in range(1, 6) ],
+        'archives': [ { 'id': format(i, 'X'), '_type': 'transaction', 'date': 100 + i, 'author': '1', 'target': '2', 'details': { 'amount': i } } for i in range(1, 8) ],
+        'voters': [ { 'vote_id': 'A', 'voter_id': format(i, 'X'), 'date': i } for i in range(1, 5) ] + [ { 'vote_id': 'B', 'voter_id': '1', 'date': 9 } ],
+        'votes': []
+    }))
+
+def test_sync(make_replica, tmp_path):
+    instance = source(make_replica)
+    path = str(tmp_path / 'replica.db')
+
+    assert sync_replica(instance, path, TABLES, page_size = 2) == { 'accounts': 5, 'archives': 7, 'voters': 5, 'votes': 0 }
+
+    instance.db._write('archives', [ { 'id': 'FF', '_type': 'transaction', 'date': 200, 'author': '1', 'target': '2', 'details': { 'amount': 50 } } ])
+
+    assert sync_replica(instance, path, TABLES, page_size = 2) == { 'accounts': 5, 'archives': 1, 'voters': 5, 'votes': 0 } # Seule la nouvelle archive est récupérée
+
+    replica = ReplicaClient(path)
+
+    try:
+        voters = replica.from_('voters').select('*').order('vote_id').order('voter_id').execute().data
+
+        assert len(voters) == 5 # Clé primaire (vote_id, voter_id)
+        assert replica.from_('votes').select('*').execute().data == []
+
+        accounts = replica.from_('accounts').select('id, tags, frozen').eq('id', '3').execute().data
+
+        assert accounts == [ { 'id': '3', 'tags': [ 3 ], 'frozen': False } ]
+
+        archives = replica.from_('archives').select('id, amount:details->amount', count = 'exact').gt('date', 105).order('date', desc = True).execute()
+
+        assert archives.count == 3
+        assert archives.data == [ { 'id': 'FF', 'amount': 50 }, { 'id': '7', 'amount': 7 }, { 'id': '6', 'amount': 6 } ]
+
+        with pytest.raises(LookupError):
+            replica.from_('items').select('*').execute()
+    finally:
+        replica.close()
+
+def test_mutable_tables(make_replica, tmp_path):
+    instance = Instance(make_replica({ 'individuals': [ { 'id': 'A', 'name': "Martin", 'register_date': 1 }, { 'id': 'B', 'name': "Paul", 'register_date': 2 } ] }))
+    path = str(tmp_path / 'replica.db')
+    tables = { 'individuals': DEFAULT_TABLES['individuals'] }
+
+    sync_replica(instance, path, tables)
+
+    instance.db._write('individuals', [ { 'id': 'A', 'name': "Élodie", 'register_date': 1 } ])
+    instance.db.db.execute("DELETE FROM individuals WHERE id = 'B'")
+    instance.db.db.commit()
+
+    sync_replica(instance, path, tables)
+    replica = ReplicaClient(path)
+
+    try:
+        assert replica.from_('individuals').select('id, name').execute().data == [ { 'id': 'A', 'name': "Élodie" } ] # Modification et suppression recopiées
+    finally:
+        replica.close()
+
+def test_instance_on_replica(make_replica, make_instance, tmp_path):
+    path = str(tmp_path / 'replica.db')
+    sync_replica(source(make_replica), path, TABLES)
+
+    instance = make_instance(EconomyInstance, None)
+    instance.use_replica(path)
+    account = instance.get_account('2')
+
+    assert account.amount == 2 and account.bank == 'HexaBank'
+    assert instance._count_in_db('archives', date__gt = 105) == 2
+    assert [ row['id'] for page in instance._stream_from_db('archives', 'id, date', key = ('date', 'id'), page_size = 2, start = (103, '3')) for row in page ] == [ '4', '5', '6', '7' ]
+
+    with pytest.raises(PermissionError):
+        instance.save_account(account)
+
+    with pytest.raises(PermissionError):
+        instance._call_rpc('transfer_many', { 'transfers': [] })
+
+    instance.db.close()
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from postgrest.exceptions import APIError
+
+from nsarchive import Administration, AlreadyVotedError, Assembly, Court, Government, Official, PoliceForces, RessourceNotFoundError, State, Vote, VoteOption
+from nsarchive.instances._republic import RepublicInstance
+
+def vote(*counts: int) -> Vote:
+    _vote = Vote('1', "Test")
+    _vote.choices = [ VoteOption(f"opt{i}", count = count) for i, count in enumerate(counts) ]
+
+    return _vote
+
+def test_sorted():
+    _vote = vote(2, 5, 1)
+
+    assert _vote.sorted(titles_only = True) == [ 'opt1', 'opt0', 'opt2' ]
+    assert _vote.sorted()[0] is _vote.by_id('opt1')
+
+def test_percentages():
+    assert vote(1, 3).percentages() == { 'opt0': 25.0, 'opt1': 75.0 }
+    assert vote(0, 0).percentages() == { 'opt0': 0.0, 'opt1': 0.0 }
+
+def test_leader():
+    assert vote(1, 3).leader().id == 'opt1'
+    assert vote(0, 0).leader() is None
+    assert vote().leader() is None
+
+def state() -> State:
+    institutions = State()
+
+    for name, cls in (('administration', Administration), ('assembly', Assembly), ('court', Court), ('police', PoliceForces)):
+        institution = cls()
+        institution.president = Official('1')
+        institution.members = [ Official('1'), Official('2') ]
+        setattr(institutions, name, institution)
+
+    institutions.government = Government(Official('A'))
+
+    for minister in ('prime_minister', 'inner_minister', 'economy_minister', 'justice_minister', 'press_minister', 'outer_minister'):
+        setattr(institutions.government, minister, Official('B'))
+
+    return institutions
+
+def test_update_institutions(make_replica, make_instance, monkeypatch):
+    base = make_replica({
+        'functions': [
+            { 'id': 'ADMIN', 'users': [ '1', '2' ] },
+            { 'id': 'REPR', 'users': [ '2', '1' ] }, # Ordre différent: réécrit
+            { 'id': 'PRE_REP', 'users': [ 'a' ] }, # Même ID, autre casse
+            { 'id': 'MIN_PRIM', 'users': [ 'C' ] }
+        ]
+    })
+
+    instance = make_instance(RepublicInstance, base)
+    writes = []
+    monkeypatch.setattr(instance, '_put_in_db', lambda table, _data : writes.append((table, _data)))
+
+    instance.update_institutions(state())
+
+    assert len(writes) == 1 # Une seule requête
+    assert writes[0][0] == 'functions'
+    assert sorted(_data['id'] for _data in writes[0][1]) == sorted([ 'REPR', 'JUDGE', 'POLICE', 'PRE_AS', 'MIN_PRIM', 'MIN_INN', 'MIN_JUS', 'MIN_ECO', 'MIN_AUD', 'MIN_OUT' ])
+    assert { _data['id']: _data['users'] for _data in writes[0][1] }['MIN_PRIM'] == [ 'B' ]
+
+def test_update_institutions_unchanged(make_replica, make_instance, monkeypatch):
+    institutions = state()
+    functions = {
+        'ADMIN': [ '1', '2' ], 'REPR': [ '1', '2' ], 'JUDGE': [ '1', '2' ], 'POLICE': [ '1', '2' ], 'PRE_AS': [ '1' ], 'PRE_REP': [ 'A' ],
+        'MIN_PRIM': [ 'B' ], 'MIN_INN': [ 'B' ], 'MIN_JUS': [ 'B' ], 'MIN_ECO': [ 'B' ], 'MIN_AUD': [ 'B' ], 'MIN_OUT': [ 'B' ]
+    }
+
+    instance = make_instance(RepublicInstance, make_replica({ 'functions': [ { 'id': id, 'users': users } for id, users in functions.items() ] }))
+    writes = []
+    monkeypatch.setattr(instance, '_put_in_db', lambda table, _data : writes.append((table, _data)))
+
+    instance.update_institutions(institutions)
+
+    assert writes == []
+
+def rpc(result):
+    def call(function: str, params: dict):
+        assert function == 'cast_vote'
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+    return call
+
+def test_cast_vote(make_replica, make_instance, monkeypatch):
+    instance = make_instance(RepublicInstance, make_replica({}))
+
+    _vote = Vote('A', "Test")
+    _vote.choices = [ VoteOption('yes'), VoteOption('no') ]
+    instance._tallies['A'] = (time.time(), _vote)
+
+    monkeypatch.setattr(instance, '_call_rpc', rpc('ok'))
+    instance.cast_vote('a', 'yes', '1')
+
+    assert _vote.by_id('yes').count == 1 # Le décompte en cache suit le vote
+    assert instance._voters['A'] == { '1' }
+
+@pytest.mark.parametrize('result, error', [
+    ('already_voted', AlreadyVotedError),
+    (APIError({ 'code': '23505', 'message': "duplicate key" }), AlreadyVotedError),
+    ('not_found', RessourceNotFoundError),
+    ('oops', RuntimeError),
+    (None, RuntimeError),
+    (APIError({ 'code': '42501', 'message': "permission denied" }), APIError)
+])
+def test_cast_vote_errors(make_replica, make_instance, monkeypatch, result, error):
+    instance = make_instance(RepublicInstance, make_replica({}))
+    monkeypatch.setattr(instance, '_call_rpc', rpc(result))
+
+    with pytest.raises(error):
+        instance.cast_vote('A', 'yes', '1')
+
+    assert instance._voters.get('A') == ({ '1' } if error is AlreadyVotedError else None)
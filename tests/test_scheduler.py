@@ -0,0 +1,62 @@
+import threading
+import time
+
+from nsarchive import Sanction
+from nsarchive.instances._entities import SanctionScheduler
+
+def sanction(id: str, duration: int, age: int = 0) -> Sanction:
+    _sanction = Sanction('1', '2')
+    _sanction.id = id
+    _sanction.date = round(time.time()) - age
+    _sanction.details['duration'] = duration
+
+    return _sanction
+
+def test_scheduler_ignores():
+    scheduler = SanctionScheduler()
+
+    scheduler.add(sanction('A', 0))
+    scheduler.add(sanction('B', 10, age = 20))
+    active = sanction('C', 100)
+    scheduler.add(active)
+    scheduler.add(active)
+
+    assert len(scheduler) == 1
+    assert scheduler.next_expiry() == active.date + 100
+
+    scheduler.cancel('C')
+
+    assert len(scheduler) == 0
+    assert scheduler.next_expiry() is None
+
+def test_scheduler_fires():
+    scheduler = SanctionScheduler()
+    expired = []
+    done = threading.Event()
+
+    scheduler.callbacks.append(lambda _sanction : (expired.append(_sanction.id), done.set()))
+    scheduler.add(sanction('D', 100, age = 99))
+    scheduler.add(sanction('E', 1000))
+
+    assert done.wait(3)
+    assert expired == [ 'D' ]
+    assert len(scheduler) == 1
+
+def test_scheduler_cancel_then_add():
+    scheduler = SanctionScheduler()
+    expired = []
+    done = threading.Event()
+
+    scheduler.callbacks.append(lambda _sanction : (expired.append(_sanction.id), done.set()))
+
+    _sanction = sanction('F', 100, age = 99)
+    scheduler.add(_sanction)
+    scheduler.cancel('F')
+    scheduler.add(_sanction) # Même date d'expiration et même ID que l'entrée annulée
+
+    assert len(scheduler) == 1
+    assert done.wait(3)
+
+    time.sleep(0.2)
+
+    assert expired == [ 'F' ]
@@ -0,0 +1,104 @@
+import threading
+
+from nsarchive import ChangeEvent, ChangeFeed
+from nsarchive.cls.search import NameIndex
+from nsarchive.instances._entities import EntityInstance
+
+def index() -> NameIndex:
+    names = NameIndex()
+    names.add_many([
+        ('1', 'Élodie Martin', 'individual'),
+        ('2', 'Martin', 'individual'),
+        ('3', 'Martine Corp', 'organization'),
+        ('4', 'Paul', 'individual')
+    ])
+
+    return names
+
+def test_ranking():
+    results = index().search('martin')
+
+    assert [ id for id, _, _ in results ] == [ '2', '3', '1' ] # Identique, préfixe du nom, préfixe d'un mot
+    assert results[0] == ('2', 'Martin', 'individual')
+
+def test_accents_and_case():
+    assert [ id for id, _, _ in index().search('ELODIE') ] == [ '1' ]
+
+def test_fuzzy():
+    assert [ id for id, _, _ in index().search('martni', min_score = 0.2) ][:1] == [ '2' ]
+    assert index().search('zzz') == []
+    assert index().search('  ') == []
+
+def test_limit():
+    assert [ id for id, _, _ in index().search('mart', limit = 1) ] == [ '2' ]
+
+def test_add_many_matches_add():
+    bulk = index()
+    single = NameIndex()
+
+    for id, (name, _type, _) in bulk.entries.items():
+        single.add(id, name, _type)
+
+    assert single._words == bulk._words
+    assert single.search('mar') == bulk.search('mar')
+
+def test_update_and_remove():
+    names = index()
+
+    names.add('2', 'Jean Dupont', 'individual')
+    names.remove('3')
+    names.remove('404')
+
+    assert len(names) == 3
+    assert [ id for id, _, _ in names.search('martin') ] == [ '1' ]
+    assert [ id for id, _, _ in names.search('dupont') ] == [ '2' ]
+    assert ('martine', '3') not in names._words
+
+def test_search_entities(make_replica, make_instance):
+    base = make_replica({
+        'individuals': [ { 'id': 'A', 'name': "Élodie Martin" }, { 'id': 'B', 'name': "Martin" } ],
+        'organizations': [ { 'id': 'D', 'name': "Martine Corp" } ]
+    })
+
+    instance = make_instance(EntityInstance, base)
+
+    assert instance.search_entities('martin') == [ ('B', 'Martin', 'individual'), ('D', 'Martine Corp', 'organization'), ('A', 'Élodie Martin', 'individual') ]
+
+def test_feed_skips_unchanged_names(make_replica, make_instance, monkeypatch):
+    instance = make_instance(EntityInstance, make_replica({ 'individuals': [ { 'id': 'A', 'name': "Martin" } ], 'organizations': [] }))
+    feed = ChangeFeed()
+    instance.attach_feed(feed)
+    instance.build_name_index()
+
+    added = []
+    monkeypatch.setattr(instance._names, 'add', lambda *args : added.append(args))
+
+    feed.publish(ChangeEvent('individuals', 'UPDATE', { 'id': 'A', 'name': "Martin", 'xp': 50 }))
+
+    assert added == []
+
+    feed.publish(ChangeEvent('individuals', 'UPDATE', { 'id': 'A', 'name': "Paul", 'xp': 50 }))
+
+    assert added == [ ('A', "Paul", 'individual') ]
+
+def test_concurrent_updates():
+    names = index()
+    done = threading.Event()
+
+    def update():
+        for i in range(2000):
+            names.add(f"{i % 50 + 10:X}", f"Martin {i}", 'individual')
+            names.remove(f"{(i + 25) % 50 + 10:X}")
+
+        done.set()
+
+    thread = threading.Thread(target = update)
+    thread.start()
+
+    while not done.is_set():
+        names.search('martin', min_score = 0.1)
+        names.search('mrtin', min_score = 0.1)
+
+    thread.join()
+
+    assert names.search('martin')[0][0] == '2'
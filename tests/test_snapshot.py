@@ -0,0 +1,36 @@
+from nsarchive.cls.base import Instance
+from nsarchive.replica import DEFAULT_TABLES
+from nsarchive.snapshot import TABLES, Snapshot, export_snapshot
+
+ROWS = {
+    'accounts': [ { 'id': format(i, 'X'), 'owner_id': '1', 'amount': i * 10, 'rate': i / 4, 'frozen': i % 2 == 0, 'tags': [ i ], 'note': None if i % 2 else "x" } for i in range(1, 8) ],
+    'voters': [ { 'vote_id': 'A', 'voter_id': format(i, 'X'), 'date': i } for i in range(1, 4) ],
+    'votes': []
+}
+
+def test_round_trip(make_replica, tmp_path):
+    instance = Instance(make_replica(ROWS))
+    path = str(tmp_path / 'snapshot')
+
+    manifest = export_snapshot(instance, path, ROWS, chunk_size = 3, page_size = 2)
+
+    assert len(manifest['tables']['accounts']['chunks']) == 3
+
+    snapshot = Snapshot(path)
+
+    try:
+        assert snapshot.tables == { 'accounts': 7, 'voters': 3, 'votes': 0 }
+
+        for table, rows in ROWS.items():
+            assert [ row for chunk in snapshot.rows(table) for row in chunk ] == rows
+
+        amounts = snapshot.column('accounts', 'amount')
+
+        assert all(isinstance(chunk, memoryview) for chunk in amounts) # Colonne binaire, lue en mémoire partagée
+        assert [ value for chunk in amounts for value in chunk ] == [ i * 10 for i in range(1, 8) ]
+    finally:
+        snapshot.close()
+
+def test_tables():
+    assert 'positions' in TABLES
+    assert tuple(DEFAULT_TABLES) == TABLES # Les snapshots et la réplique couvrent les mêmes tables
@@ -0,0 +1,57 @@
+from nsarchive import User, xp_to_level
+from nsarchive.instances._entities import EntityInstance, XPBuffer
+
+def level_xp(level: int) -> int: # XP nécessaire pour atteindre un niveau
+    return int(round(25 * (level * 2.5) ** 2, -2))
+
+def test_xp_to_level():
+    assert xp_to_level(0) == 0
+    assert xp_to_level(level_xp(5)) == 5
+    assert xp_to_level(level_xp(5) + 1) == 6
+    assert xp_to_level(level_xp(2500)) == 2500 # Au-delà de la table précalculée
+
+def test_xp_buffer(make_replica, make_instance, monkeypatch):
+    base = make_replica({
+        'individuals': [
+            { 'id': 'B', 'boosts': { 'booster': 3 } },
+            { 'id': 'C', 'boosts': { 'booster': 2, 'sanction': 0 } } # XP désactivé
+        ]
+    })
+
+    instance = make_instance(EntityInstance, base)
+    calls = []
+    monkeypatch.setattr(instance, '_call_rpc', lambda function, params : calls.append((function, params)))
+
+    buffer = XPBuffer(instance, interval = 3600)
+
+    user = User('A')
+    user.xp = 10
+    user.edit_boost('event', 2)
+
+    assert buffer.add(user, 5) == 10
+    assert buffer.add('A', 1) == 2 # Dernier multiplicateur connu
+    assert buffer.add('B', 3) == 9 # Multiplicateur calculé à partir des boosts
+    assert buffer.add('C', 3) == 0
+    assert buffer.add('D', 3) == 3 # Membre inconnu
+
+    assert user.xp == 10 # L'XP local n'est pas modifié
+    assert buffer.pending('A') == 12
+
+    buffer.close()
+
+    assert calls == [ ('add_xp_many', { 'deltas': [ { 'id': 'A', 'xp': 12 }, { 'id': 'B', 'xp': 9 }, { 'id': 'D', 'xp': 3 } ] }) ]
+    assert buffer.pending('A') == 0
+
+def test_leaderboard(make_replica, make_instance):
+    base = make_replica({
+        'individuals': [
+            { 'id': 'A', 'name': "Paul", 'xp': 500 },
+            { 'id': 'B', 'name': "Martin", 'xp': 900 },
+            { 'id': 'C', 'name': "Jean", 'xp': 500 }
+        ]
+    })
+
+    instance = make_instance(EntityInstance, base)
+
+    assert [ (rank, id) for rank, id, _, _, _ in instance.get_leaderboard() ] == [ (1, 'B'), (2, 'C'), (2, 'A') ] # Ex aequo départagés par ID
+    assert [ (rank, id, level) for rank, id, _, _, level in instance.get_leaderboard(limit = 1, offset = 2) ] == [ (2, 'A', xp_to_level(500)) ]